@@ -0,0 +1,169 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None.
+    resource = None
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SRC_DIR)
+from common.sharded_parse import find_drug_ranges
+
+# Benchmarked parsers: name -> (subtask directory, function).
+PARSERS = {
+    "parse_drugbank_xml": ("subtask_01", "parse_drugbank_xml"),
+    "parse_pharma_products": ("subtask_03", "parse_pharma_products"),
+    "parse_all_pathways": ("subtask_06", "parse_all_pathways"),
+    "parse_targets_info": ("subtask_07", "parse_targets_info"),
+    "parse_drug_status": ("subtask_09", "parse_drug_status"),
+    "parse_drug_interactions": ("subtask_10", "parse_drug_interactions"),
+    "parse_drugbank_for_gene": ("subtask_11", "parse_drugbank_for_gene"),
+}
+
+# Dataset sizes in drugs, generated by subtask_13 from the source XML file.
+SCALES = [100, 20000, 200000]
+
+# Return the peak resident set size of the current process in bytes.
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# Return the current resident set size of the process in bytes, or None if unknown.
+def current_rss():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+# Import a parser from its subtask directory.
+def load_parser(name):
+    subtask, function = PARSERS[name]
+    sys.path.insert(0, os.path.join(SRC_DIR, subtask))
+    return getattr(importlib.import_module(subtask), function)
+
+# Run one parser on a file and measure it. Runs in a fresh process, so the peak RSS
+# belongs to this parser alone; the RSS after the imports is reported as the baseline.
+def run_parser(name, file_path, gene):
+    parser = load_parser(name)
+    args = (file_path, gene) if name == "parse_drugbank_for_gene" else (file_path,)
+    baseline = current_rss()
+
+    start = time.perf_counter()
+    result = parser(*args)
+    wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time_s": wall_time,
+        "baseline_rss_bytes": baseline,
+        "peak_rss_bytes": peak_rss(),
+        "rows": len(result) if hasattr(result, "__len__") else None,
+    }
+
+# Run one parser `repeat` times, each in a new process, and summarize the runs.
+def benchmark_parser(name, file_path, drug_count, gene, repeat=1, isolate=True):
+    runs = []
+    for _ in range(repeat):
+        if isolate:
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                runs.append(pool.submit(run_parser, name, file_path, gene).result())
+        else:
+            runs.append(run_parser(name, file_path, gene))
+
+    wall_time = min(run["wall_time_s"] for run in runs)
+    peaks = [run["peak_rss_bytes"] for run in runs if run["peak_rss_bytes"] is not None]
+    return {
+        "parser": name,
+        "drugs": drug_count,
+        "rows": runs[0]["rows"],
+        "wall_time_s": wall_time,
+        "drugs_per_s": drug_count / wall_time if wall_time > 0 else None,
+        "peak_rss_bytes": max(peaks) if peaks else None,
+        "baseline_rss_bytes": runs[0]["baseline_rss_bytes"],
+        "runs": [run["wall_time_s"] for run in runs],
+    }
+
+# Generate a fixture with the given number of drugs, unless it already exists.
+# Generation is seeded, so every commit is benchmarked on the same file.
+def generate_fixture(source, total_drugs, fixture_dir, seed=0, workers=None):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    path = os.path.join(fixture_dir, f"{stem}-{total_drugs}-seed{seed}.xml")
+    if not os.path.exists(path):
+        sys.path.insert(0, os.path.join(SRC_DIR, "subtask_13"))
+        import subtask_13
+
+        os.makedirs(fixture_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        subtask_13.main(total_drugs, source, tmp_path, seed=seed, workers=workers or 1)
+        os.replace(tmp_path, path)
+    return path
+
+# Return the current git commit, or None outside a git checkout.
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=SRC_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Benchmark the parsers on fixtures of every scale and return the report.
+def run_benchmarks(source, scales=SCALES, parsers=None, fixture_dir=None, gene="F2", repeat=1,
+                   seed=0, workers=None, isolate=True):
+    fixture_dir = fixture_dir or os.path.join(SRC_DIR, "benchmarks", "fixtures")
+    parsers = parsers or list(PARSERS)
+    results = []
+    for scale in scales:
+        file_path = generate_fixture(source, scale, fixture_dir, seed, workers)
+        drug_count = len(find_drug_ranges(file_path)[2])
+        for name in parsers:
+            result = benchmark_parser(name, file_path, drug_count, gene, repeat, isolate)
+            result["scale"] = scale
+            results.append(result)
+            print(f"{name} on {drug_count} drugs: {result['wall_time_s']:.3f} s, "
+                  f"{result['drugs_per_s'] or 0:.0f} drugs/s")
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "source": os.path.basename(source),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+# Write the report as JSON.
+def write_report(report, output):
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Benchmark results saved as: {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DrugBank parsers on generated XML files.")
+    parser.add_argument("--source", default=os.path.join(SRC_DIR, "drugbank_partial.xml"),
+                        help="XML file the fixtures are generated from")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="fixture sizes in drugs")
+    parser.add_argument("--parsers", nargs="+", choices=list(PARSERS), help="parsers to run (default: all)")
+    parser.add_argument("--fixture-dir", help="directory of the generated fixtures")
+    parser.add_argument("--gene", default="F2", help="gene name for parse_drugbank_for_gene")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per parser; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the fixture generator")
+    parser.add_argument("--workers", type=int, help="processes generating the fixtures")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.source, args.scales, args.parsers, args.fixture_dir, args.gene,
+                            args.repeat, args.seed, args.workers)
+    write_report(report, args.output)
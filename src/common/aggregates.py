@@ -0,0 +1,111 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from common.drugbank_xml import NS, raw_text, get_text, iter_drugs
+from common.sharded_parse import SHARDS_PER_WORKER, find_drug_ranges, split_shards, read_shard
+from common.xml_backend import find, findall
+
+# Streaming aggregates for the chart subtasks. Every aggregate is fed one drug element at a
+# time with add(), keeps only its counts, and merge() combines the partial counts of shards.
+
+# Number of targets per cellular location (subtask_08).
+class LocationCounts:
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, drug, ns=NS):
+        for target in findall(drug, "db:targets/db:target", ns):
+            # Only the first polypeptide of a complex target, as in parse_targets_info.
+            polypep = find(target, "db:polypeptide", ns)
+            if polypep is None:
+                continue
+            location = get_text(polypep, "db:cellular-location", ns)
+            if location is not None:
+                self.counts[location] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    # Locations and counts, most common first.
+    def result(self):
+        return dict(self.counts.most_common())
+
+# Number of drugs per status and approved drugs that were not withdrawn (subtask_09).
+class StatusCounts:
+    def __init__(self):
+        self.counts = {"approved": 0, "withdrawn": 0, "experimental": 0, "vet_approved": 0,
+                       "approved_not_withdrawn": 0}
+
+    def add(self, drug, ns=NS):
+        groups = {grp.text.strip().lower() for grp in findall(drug, "db:groups/db:group", ns) if grp.text}
+        self.counts["approved"] += "approved" in groups
+        self.counts["withdrawn"] += "withdrawn" in groups
+        self.counts["experimental"] += "experimental" in groups or "investigational" in groups
+        self.counts["vet_approved"] += "vet_approved" in groups
+        self.counts["approved_not_withdrawn"] += "approved" in groups and "withdrawn" not in groups
+
+    def merge(self, other):
+        for status, count in other.counts.items():
+            self.counts[status] += count
+        return self
+
+    def result(self):
+        return dict(self.counts)
+
+# Number of distinct pathways per drug name, or per DrugBank ID with key="drug_ids" (subtask_06).
+class PathwayCounts:
+    def __init__(self, key="drug_names"):
+        self.key = key
+        self.pathways = {}
+
+    def add(self, drug, ns=NS):
+        tag = "db:drugbank-id" if self.key == "drug_ids" else "db:name"
+        for pathway in findall(drug, "db:pathways/db:pathway", ns):
+            pathway_name = raw_text(pathway, "db:name", ns)
+            for drug_item in findall(pathway, "db:drugs/db:drug", ns):
+                value = raw_text(drug_item, tag, ns)
+                if value:
+                    self.pathways.setdefault(value, set()).add(pathway_name)
+
+    def merge(self, other):
+        for drug, pathway_names in other.pathways.items():
+            self.pathways.setdefault(drug, set()).update(pathway_names)
+        return self
+
+    # Mapping from drug to its pathway count, like build_drug_pathway_counts.
+    def result(self):
+        return {drug: len(pathway_names) for drug, pathway_names in self.pathways.items()}
+
+# Feed every drug of the XML file to the aggregates in a single streaming pass.
+def aggregate(file_path, aggregates):
+    for drug in iter_drugs(file_path):
+        for counter in aggregates:
+            counter.add(drug)
+    return aggregates
+
+# Feed the drugs of one shard to fresh copies of the aggregates and return the partial counts.
+def aggregate_shard(file_path, header, footer, start, end, aggregates):
+    for drug in read_shard(file_path, header, footer, start, end):
+        for counter in aggregates:
+            counter.add(drug)
+    return aggregates
+
+# Aggregate the XML file with a pool of worker processes, merging the shard results in file order.
+def aggregate_parallel(file_path, aggregates, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return aggregate(file_path, aggregates)
+
+    header, footer, ranges = find_drug_ranges(file_path)
+    shards = split_shards(ranges, workers * SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(aggregate_shard, file_path, header, footer, start, end, aggregates)
+                   for start, end in shards]
+        # Every shard gets a pickled copy of the aggregates, so they must be empty when passed in.
+        partials = [future.result() for future in futures]
+    for partial in partials:
+        for counter, part in zip(aggregates, partial):
+            counter.merge(part)
+    return aggregates
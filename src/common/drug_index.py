@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Column holding the DrugBank ID of the owning drug in every table of common/drugbank_tables.py.
+# Pathways list their drugs in the drug_ids column instead.
+ID_COLUMNS = {
+    "drugs": "drug_id",
+    "synonyms": "drug_id",
+    "products": "drug_id",
+    "pathways": "drug_ids",
+    "targets": "Drug_ID",
+    "groups": "drug_id",
+    "interactions": "DrugBank_ID",
+}
+
+# Row positions of a table grouped by DrugBank ID.
+# The positions of drug d are order[start:end] for (start, end) = ranges[d], so a lookup
+# is one hash probe and a slice, whether the drug owns one row or thousands.
+class DrugIdIndex:
+    def __init__(self, ids, positions=None):
+        codes, drug_ids = pd.factorize(pd.Series(ids, dtype=object))
+        positions = np.arange(len(codes)) if positions is None else np.asarray(positions)
+        known = codes >= 0
+        codes, positions = codes[known], positions[known]
+
+        # Stable sort keeps the rows of every drug in table order.
+        order = np.argsort(codes, kind="stable")
+        self.order = positions[order]
+        offsets = np.zeros(len(drug_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(drug_ids)), out=offsets[1:])
+        self.ranges = {drug_id: (offsets[i], offsets[i + 1]) for i, drug_id in enumerate(drug_ids)}
+
+    def __contains__(self, drug_id):
+        return drug_id in self.ranges
+
+    # Return the row positions of a drug, empty for an unknown DrugBank ID.
+    def positions(self, drug_id):
+        start, end = self.ranges.get(drug_id, (0, 0))
+        return self.order[start:end]
+
+    # Return the rows of a drug from the table the index was built for.
+    def rows(self, df, drug_id):
+        return df.iloc[self.positions(drug_id)]
+
+# Index one table by the DrugBank IDs in a column; list columns index a row under every listed ID.
+def index_table(df, column="drug_id"):
+    values = df[column]
+    if len(values) and isinstance(values.iloc[0], (list, np.ndarray)):
+        exploded = pd.Series(list(values), dtype=object).explode()
+        return DrugIdIndex(exploded.to_numpy(), exploded.index.to_numpy())
+    return DrugIdIndex(values.to_numpy())
+
+# DrugBank ID lookups over all tables, indexed once when the tables are loaded.
+class DrugLookup:
+    def __init__(self, tables):
+        self.tables = tables
+        self.indexes = {table: index_table(tables[table], column)
+                        for table, column in ID_COLUMNS.items() if table in tables}
+
+    def __contains__(self, drug_id):
+        return drug_id in self.indexes["drugs"]
+
+    # Return the rows of a table that belong to a drug.
+    def rows(self, table, drug_id):
+        return self.indexes[table].rows(self.tables[table], drug_id)
+
+    # Return the rows of every table that belong to a drug.
+    def drug(self, drug_id):
+        return {table: self.rows(table, drug_id) for table in self.indexes}
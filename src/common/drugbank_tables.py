@@ -0,0 +1,173 @@
+import pandas as pd
+
+from common.drugbank_xml import NS, raw_text, get_text, primary_ids, iter_drugs
+from common.instrumentation import span, count
+from common.xml_backend import parse_xml, find, findall
+
+# Columns of every table, in the same order as the per-subtask parsers return them.
+DRUG_COLUMNS = ["drug_id", "name", "type", "description", "state",
+                "indications", "mechanism", "food_interactions"]
+SYNONYM_COLUMNS = ["drug_id", "name", "synonyms"]
+PRODUCT_COLUMNS = ["drug_id", "product_name", "producer", "ndc_product_code", "dosage_form",
+                   "route", "strength", "country", "regulatory_agency"]
+PATHWAY_COLUMNS = ["id", "pathway_name", "category", "drug_ids", "drug_names"]
+TARGET_COLUMNS = ["DrugBank_ID", "Source", "External_ID", "Polypeptide_name", "Gene_name",
+                  "GenAtlas_ID", "Chromosome", "Cellular_location"]
+GROUP_COLUMNS = ["drug_id", "groups"]
+INTERACTION_COLUMNS = ["DrugBank_ID", "Drug_Official_Name", "Interacting_DrugBank_ID",
+                       "Interacting_Drug_Name", "Description"]
+
+TABLE_COLUMNS = {
+    "drugs": DRUG_COLUMNS,
+    "synonyms": SYNONYM_COLUMNS,
+    "products": PRODUCT_COLUMNS,
+    "pathways": PATHWAY_COLUMNS,
+    # Targets carry the owning drug and its first UniProtKB identifier as well.
+    "targets": ["Drug_ID"] + TARGET_COLUMNS + ["UniProt_ID"],
+    "groups": GROUP_COLUMNS,
+    "interactions": INTERACTION_COLUMNS,
+}
+
+# Create empty row lists for every table.
+def new_rows():
+    return {table: [] for table in TABLE_COLUMNS}
+
+# Extract rows for every table from a single drug element.
+def extract_drug(drug, rows, ns=NS):
+    drug_id, link_id = primary_ids(drug, ns)
+    name = raw_text(drug, "db:name", ns)
+
+    rows["drugs"].append({
+        "drug_id": drug_id,
+        "name": name,
+        "type": drug.attrib.get("type", None),
+        "description": raw_text(drug, "db:description", ns),
+        "state": raw_text(drug, "db:state", ns),
+        "indications": raw_text(drug, "db:indication", ns),
+        "mechanism": raw_text(drug, "db:mechanism-of-action", ns),
+        "food_interactions": raw_text(drug, "db:food-interactions", ns)
+    })
+
+    rows["synonyms"].append({
+        "drug_id": drug_id,
+        "name": name,
+        "synonyms": [elem.text for elem in findall(drug, "db:synonyms/db:synonym", ns)]
+    })
+
+    # Products.
+    for prod in findall(drug, "db:products/db:product", ns):
+        fda = raw_text(prod, "db:fda-application-number", ns)
+        ema = raw_text(prod, "db:ema-product-code", ns)
+        if fda and fda.strip() != "":
+            country, agency = "USA", "FDA"
+        elif ema and ema.strip() != "":
+            country, agency = "EU", "EMA"
+        else:
+            country, agency = None, None
+        rows["products"].append({
+            "drug_id": drug_id,
+            "product_name": raw_text(prod, "db:name", ns),
+            "producer": raw_text(prod, "db:labeller", ns),
+            "ndc_product_code": raw_text(prod, "db:ndc-product-code", ns),
+            "dosage_form": raw_text(prod, "db:dosage-form", ns),
+            "route": raw_text(prod, "db:route", ns),
+            "strength": raw_text(prod, "db:strength", ns),
+            "country": country,
+            "regulatory_agency": agency
+        })
+
+    # Pathways together with the drugs listed in them.
+    for pathway in findall(drug, "db:pathways/db:pathway", ns):
+        drug_ids = []
+        drug_names = []
+        for drug_item in findall(pathway, "db:drugs/db:drug", ns):
+            d_id_elem = find(drug_item, "db:drugbank-id", ns)
+            d_name_elem = find(drug_item, "db:name", ns)
+            if d_id_elem is not None:
+                drug_ids.append(d_id_elem.text)
+            if d_name_elem is not None:
+                drug_names.append(d_name_elem.text)
+        rows["pathways"].append({
+            "id": raw_text(pathway, "db:smpdb-id", ns),
+            "pathway_name": raw_text(pathway, "db:name", ns),
+            "category": raw_text(pathway, "db:category", ns),
+            "drug_ids": drug_ids,
+            "drug_names": drug_names
+        })
+
+    # Targets with a polypeptide.
+    for target in findall(drug, "db:targets/db:target", ns):
+        polypep = find(target, "db:polypeptide", ns)
+        if polypep is None:
+            continue
+        genatlas_id = None
+        uniprot_id = None
+        for ext in findall(polypep, "db:external-identifiers/db:external-identifier", ns):
+            resource = get_text(ext, "db:resource", ns)
+            if resource == "GenAtlas" and genatlas_id is None:
+                genatlas_id = get_text(ext, "db:identifier", ns)
+            elif resource == "UniProtKB" and uniprot_id is None:
+                uniprot_id = get_text(ext, "db:identifier", ns)
+        rows["targets"].append({
+            "Drug_ID": drug_id,
+            "DrugBank_ID": get_text(target, "db:id", ns),
+            "Source": polypep.attrib.get("source"),
+            "External_ID": polypep.attrib.get("id"),
+            "Polypeptide_name": get_text(polypep, "db:name", ns),
+            "Gene_name": get_text(polypep, "db:gene-name", ns),
+            "GenAtlas_ID": genatlas_id,
+            "Chromosome": get_text(polypep, "db:chromosome-location", ns),
+            "Cellular_location": get_text(polypep, "db:cellular-location", ns),
+            "UniProt_ID": uniprot_id
+        })
+
+    rows["groups"].append({
+        "drug_id": drug_id,
+        "groups": [grp.text.strip().lower() for grp in findall(drug, "db:groups/db:group", ns) if grp.text]
+    })
+
+    # Drug-drug interactions.
+    official_name = get_text(drug, "db:name", ns)
+    for interaction in findall(drug, "db:drug-interactions/db:drug-interaction", ns):
+        inter_id = interaction.attrib.get("drugbank-id") or get_text(interaction, "db:drugbank-id", ns)
+        inter_name = interaction.attrib.get("name") or get_text(interaction, "db:name", ns)
+        rows["interactions"].append({
+            "DrugBank_ID": link_id,
+            "Drug_Official_Name": official_name,
+            "Interacting_DrugBank_ID": inter_id,
+            "Interacting_Drug_Name": inter_name,
+            "Description": get_text(interaction, "db:description", ns)
+        })
+
+# Turn collected rows into DataFrames with fixed columns.
+def build_tables(rows):
+    with span("dataframe_build"):
+        for table in TABLE_COLUMNS:
+            count(f"rows.{table}", len(rows[table]))
+        return {table: pd.DataFrame(rows[table], columns=columns)
+                for table, columns in TABLE_COLUMNS.items()}
+
+# Parse the DrugBank XML once and return all tables used by the subtasks.
+# With stream=True every drug element is freed as soon as it has been processed.
+def extract_tables(file_path, stream=False):
+    rows = new_rows()
+    if stream:
+        # Parsing and extraction interleave, so they are timed as one stage.
+        with span("xml_parse_and_extraction"):
+            drug_count = 0
+            for drug in iter_drugs(file_path):
+                extract_drug(drug, rows)
+                drug_count += 1
+            count("drug_elements", drug_count)
+    else:
+        with span("xml_parse"):
+            drugs = findall(parse_xml(file_path).getroot(), "db:drug", NS)
+        with span("extraction"):
+            for drug in drugs:
+                extract_drug(drug, rows)
+            count("drug_elements", len(drugs))
+    return build_tables(rows)
+
+# Return the pathways table as the list of records subtasks 04-06 work on.
+def pathway_records(tables):
+    return tables["pathways"].to_dict("records")
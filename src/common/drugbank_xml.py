@@ -0,0 +1,29 @@
+from common.xml_backend import iter_top_level, find
+
+NS = {'db': 'http://www.drugbank.ca'}
+
+# Return raw text from a subelement.
+def raw_text(elem, tag, ns=NS):
+    subelem = find(elem, tag, ns)
+    return subelem.text if subelem is not None else None
+
+# Return stripped text from a subelement.
+def get_text(elem, tag, ns=NS):
+    subelem = find(elem, tag, ns)
+    return subelem.text.strip() if subelem is not None and subelem.text else None
+
+# Return the (raw, stripped) primary DrugBank ID of a drug element.
+def primary_ids(drug, ns=NS):
+    id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
+    raw_id = id_elem.text if id_elem is not None else None
+    if id_elem is None or not id_elem.text:
+        # Fall back to the first identifier, as subtask_10 does.
+        id_elem = find(drug, "db:drugbank-id", ns)
+    stripped_id = id_elem.text.strip() if id_elem is not None and id_elem.text else None
+    return raw_id, stripped_id
+
+# Yield top-level drug elements while streaming the XML file.
+# Each drug is cleared and detached from the root once the caller moves on,
+# so memory stays bounded by the size of a single drug.
+def iter_drugs(file_path, ns=NS):
+    return iter_top_level(file_path, f"{{{ns['db']}}}drug")
@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Profiler receiving the spans and counters; None while instrumentation is off,
+# so instrumented code pays a single check per stage.
+ACTIVE_PROFILER = None
+
+# A finished stage: wall time, peak traced allocation above the memory in use
+# when it started, and the counters recorded while it was the innermost stage.
+class Span:
+    def __init__(self, name, parent, depth, start, start_memory):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.start = start
+        self.end = None
+        self.start_memory = start_memory
+        self.peak_memory = start_memory
+        self.counters = {}
+
+    def duration(self):
+        return self.end - self.start
+
+    def peak_alloc(self):
+        if self.start_memory is None:
+            return None
+        return self.peak_memory - self.start_memory
+
+# Records nested timing spans, per-span tracemalloc peaks and counters of one run.
+# Spans must be opened and closed on a single thread.
+class Profiler:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.stack = []
+        self.counters = {}
+        self.origin = time.perf_counter()
+        self.started_tracemalloc = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def stop(self):
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    @contextmanager
+    def span(self, name):
+        parent = self.stack[-1] if self.stack else None
+        start_memory = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The enclosing span keeps the peak reached so far; the child starts a new one.
+            if parent is not None:
+                parent.peak_memory = max(parent.peak_memory, peak)
+            tracemalloc.reset_peak()
+            start_memory = current
+        span = Span(name, parent.name if parent else None, len(self.stack),
+                    time.perf_counter() - self.origin, start_memory)
+        self.stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter() - self.origin
+            if start_memory is not None:
+                span.peak_memory = max(span.peak_memory, tracemalloc.get_traced_memory()[1])
+                if parent is not None:
+                    parent.peak_memory = max(parent.peak_memory, span.peak_memory)
+            self.stack.pop()
+            self.spans.append(span)
+
+    # Add n to a counter, both in total and on the innermost open span.
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+        if self.stack:
+            counters = self.stack[-1].counters
+            counters[name] = counters.get(name, 0) + n
+
+    # Return the spans in start order and the counter totals as a JSON-ready dict.
+    def to_dict(self):
+        return {
+            "spans": [{
+                "name": span.name,
+                "parent": span.parent,
+                "depth": span.depth,
+                "start_s": span.start,
+                "duration_s": span.duration(),
+                "peak_alloc_bytes": span.peak_alloc(),
+                "counters": span.counters,
+            } for span in sorted(self.spans, key=lambda span: span.start)],
+            "counters": self.counters,
+        }
+
+    # Return the spans in the Chrome trace event format, for chrome://tracing or Perfetto.
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+        for span in sorted(self.spans, key=lambda span: span.start):
+            args = dict(span.counters)
+            if span.start_memory is not None:
+                args["peak_alloc_bytes"] = span.peak_alloc()
+            events.append({
+                "name": span.name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration() * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    # Write the profile as JSON, or as a Chrome trace with chrome=True.
+    def write(self, path, chrome=False):
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace() if chrome else self.to_dict(), file, indent=2)
+
+# Return a context manager timing a stage when a profiler is active, and a no-op otherwise.
+def span(name):
+    if ACTIVE_PROFILER is None:
+        return nullcontext()
+    return ACTIVE_PROFILER.span(name)
+
+# Add n to a counter of the active profiler, if any.
+def count(name, n=1):
+    if ACTIVE_PROFILER is not None:
+        ACTIVE_PROFILER.count(name, n)
+
+# Turn instrumentation on for the duration of the block and yield the profiler.
+@contextmanager
+def profiling(trace_memory=True):
+    global ACTIVE_PROFILER
+    previous = ACTIVE_PROFILER
+    profiler = Profiler(trace_memory)
+    profiler.start()
+    ACTIVE_PROFILER = profiler
+    try:
+        yield profiler
+    finally:
+        ACTIVE_PROFILER = previous
+        profiler.stop()
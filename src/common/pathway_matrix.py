@@ -0,0 +1,71 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Pathway-drug incidence matrix: entry (i, j) is 1 when drug j is listed in pathway i.
+# Pathways and drugs are interned in order of first appearance, so pathways[i] and drugs[j]
+# name the rows and columns, and memory grows with the number of edges only.
+class PathwayDrugMatrix:
+    def __init__(self, matrix, pathways, drugs):
+        self.matrix = matrix
+        self.pathways = pathways
+        self.drugs = drugs
+        self.pathway_codes = {pathway: i for i, pathway in enumerate(pathways)}
+        self.drug_codes = {drug: j for j, drug in enumerate(drugs)}
+
+    # Number of distinct drugs in every pathway.
+    def pathway_degrees(self):
+        return np.diff(self.matrix.indptr)
+
+    # Number of distinct pathways of every drug.
+    def drug_degrees(self):
+        return np.bincount(self.matrix.indices, minlength=len(self.drugs))
+
+    # Return a mapping from drug to its pathway count, like build_drug_pathway_counts.
+    def drug_pathway_counts(self):
+        return dict(zip(self.drugs.tolist(), self.drug_degrees().tolist()))
+
+    # Return the drugs listed in a pathway.
+    def pathway_drugs(self, pathway):
+        i = self.pathway_codes.get(pathway)
+        if i is None:
+            return []
+        return self.drugs[self.matrix.indices[self.matrix.indptr[i]:self.matrix.indptr[i + 1]]].tolist()
+
+    # Return the pathways a drug is listed in.
+    def drug_pathways(self, drug):
+        j = self.drug_codes.get(drug)
+        if j is None:
+            return []
+        return self.pathways[self.matrix[:, j].nonzero()[0]].tolist()
+
+    # Return the number of drugs per pathway count: histogram[k] drugs are in k pathways.
+    def count_histogram(self):
+        return np.bincount(self.drug_degrees())
+
+    # Return the drug co-occurrence matrix: entry (a, b) counts the pathways shared by
+    # drugs a and b, and the diagonal holds every drug's pathway count.
+    def drug_cooccurrence(self):
+        return (self.matrix.T @ self.matrix).tocsr()
+
+    # Return the pathway co-occurrence matrix: entry (a, b) counts the drugs shared by pathways a and b.
+    def pathway_cooccurrence(self):
+        return (self.matrix @ self.matrix.T).tocsr()
+
+# Build the incidence matrix from parse_all_pathways records.
+# Pathways are keyed by name, like build_drug_pathway_counts; drugs by name, or by DrugBank ID with key="drug_ids".
+def build_pathway_matrix(pathways, key="drug_names"):
+    drug_lists = [[drug for drug in record.get(key, []) if drug] for record in pathways]
+    pathway_codes, pathway_names = pd.factorize(pd.Series([record.get("pathway_name") for record in pathways], dtype=object),
+                                                use_na_sentinel=False)
+    drug_codes, drug_names = pd.factorize(pd.Series(list(chain.from_iterable(drug_lists)), dtype=object))
+    rows = np.repeat(pathway_codes, [len(drugs) for drugs in drug_lists])
+
+    matrix = sparse.csr_matrix((np.ones(len(drug_codes), dtype=np.int32), (rows, drug_codes)),
+                               shape=(len(pathway_names), len(drug_names)))
+    # Repeated listings of a drug count once.
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return PathwayDrugMatrix(matrix, np.asarray(pathway_names, dtype=object), np.asarray(drug_names, dtype=object))
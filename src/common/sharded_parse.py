@@ -0,0 +1,103 @@
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from common.drugbank_tables import new_rows, extract_drug, build_tables
+from common.drugbank_xml import NS
+from common.instrumentation import span, count
+from common.xml_backend import fromstring, findall
+
+# Comments, CDATA sections and processing instructions; tags inside them are not markup.
+SKIPPED_RE = rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>"
+# Opening, closing and self-closing <drug> tags, with or without a namespace prefix.
+# Skipped regions match with group 1 set to None.
+DRUG_TAG_RE = re.compile(SKIPPED_RE + rb"|<(/?)(?:[\w.-]+:)?drug(?:\s[^>]*)?/?>", re.S)
+# Start tag of the root element; its namespace declarations are copied into every shard.
+ROOT_TAG_RE = re.compile(SKIPPED_RE + rb"|<((?:[\w.-]+:)?drugbank)(?:\s[^>]*)?>", re.S)
+
+# Shards per worker, so that uneven shards still keep every worker busy.
+SHARDS_PER_WORKER = 4
+
+# Return the root start tag, the root end tag and the (start, end) byte ranges of top-level drugs.
+def find_drug_ranges(file_path):
+    # mmap cannot map an empty file.
+    if os.path.getsize(file_path) == 0:
+        raise ValueError(f"{file_path} is empty")
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        root_match = next((match for match in ROOT_TAG_RE.finditer(data) if match.group(1)), None)
+        if root_match is None:
+            raise ValueError(f"No <drugbank> root element in {file_path}")
+        header = data[:root_match.end()]
+        footer = b"</" + root_match.group(1) + b">"
+
+        ranges = []
+        depth = 0
+        start = None
+        for match in DRUG_TAG_RE.finditer(data, root_match.end()):
+            if match.group(1) is None:
+                continue
+            if match.group(1):
+                depth -= 1
+                if depth == 0:
+                    ranges.append((start, match.end()))
+            elif match.group(0).endswith(b"/>"):
+                if depth == 0:
+                    ranges.append((match.start(), match.end()))
+            else:
+                if depth == 0:
+                    start = match.start()
+                depth += 1
+    return header, footer, ranges
+
+# Split drug ranges into contiguous byte ranges of roughly equal drug counts.
+def split_shards(ranges, shard_count):
+    shard_count = max(1, min(shard_count, len(ranges)))
+    size, extra = divmod(len(ranges), shard_count)
+    shards = []
+    first = 0
+    for i in range(shard_count):
+        last = first + size + (1 if i < extra else 0)
+        if last > first:
+            shards.append((ranges[first][0], ranges[last - 1][1]))
+        first = last
+    return shards
+
+# Parse one shard of the XML file and return its top-level drug elements.
+def read_shard(file_path, header, footer, start, end):
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        body = file.read(end - start)
+    return findall(fromstring(header + body + footer), "db:drug", NS)
+
+# Parse one shard of the XML file and return its table rows.
+def parse_shard(file_path, header, footer, start, end):
+    rows = new_rows()
+    for drug in read_shard(file_path, header, footer, start, end):
+        extract_drug(drug, rows)
+    return rows
+
+# Concatenate shard rows in order and build the tables.
+def merge_rows(parts):
+    rows = new_rows()
+    for part in parts:
+        for table, table_rows in part.items():
+            rows[table].extend(table_rows)
+    return build_tables(rows)
+
+# Parse the DrugBank XML with a pool of worker processes and return the same tables as extract_tables.
+def extract_tables_parallel(file_path, workers=None):
+    workers = workers or os.cpu_count() or 1
+    # Shards are parsed in other processes, so only the totals are timed here.
+    with span("sharded_parse"):
+        header, footer, ranges = find_drug_ranges(file_path)
+        shards = split_shards(ranges, workers * SHARDS_PER_WORKER)
+        count("drug_elements", len(ranges))
+
+        if workers == 1 or len(shards) <= 1:
+            return merge_rows(parse_shard(file_path, header, footer, start, end) for start, end in shards)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(parse_shard, file_path, header, footer, start, end) for start, end in shards]
+            # Merge in file order so the tables match a sequential parse.
+            return merge_rows(future.result() for future in futures)
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from common.drugbank_tables import extract_tables, TABLE_COLUMNS
+from common.instrumentation import span
+from common.sharded_parse import extract_tables_parallel
+
+# Bump when the extraction code changes, so old cache entries are not reused.
+CACHE_VERSION = 1
+
+# Columns holding Python lists; Parquet returns them as NumPy arrays.
+LIST_COLUMNS = {
+    "synonyms": ["synonyms"],
+    "pathways": ["drug_ids", "drug_names"],
+    "groups": ["groups"],
+}
+
+# Return the default cache directory, next to the XML file.
+def default_cache_dir(file_path):
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), ".drugbank_cache")
+
+# Return a fingerprint of the XML file from its size and mtime, or its size and content hash.
+def file_fingerprint(file_path, use_hash=False):
+    stat = os.stat(file_path)
+    if not use_hash:
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{stat.st_size}-{digest.hexdigest()[:16]}"
+
+# Return the cache entry directory for an XML file.
+def cache_entry_dir(file_path, cache_dir=None, use_hash=False):
+    cache_dir = cache_dir or default_cache_dir(file_path)
+    source = os.path.basename(file_path)
+    return os.path.join(cache_dir, f"{source}-v{CACHE_VERSION}-{file_fingerprint(file_path, use_hash)}")
+
+# Read all tables of a cache entry.
+def read_tables(entry_dir):
+    tables = {}
+    for table in TABLE_COLUMNS:
+        df = pd.read_parquet(os.path.join(entry_dir, f"{table}.parquet"))
+        for column in LIST_COLUMNS.get(table, []):
+            df[column] = df[column].map(list)
+        tables[table] = df
+    return tables
+
+# Write all tables into a new cache entry and drop older entries of the same XML file.
+def write_tables(tables, entry_dir):
+    cache_dir = os.path.dirname(entry_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write into a temporary directory first so readers never see a partial entry.
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    try:
+        for table, df in tables.items():
+            df.to_parquet(os.path.join(tmp_dir, f"{table}.parquet"), index=False)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same entry first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(entry_dir):
+            raise
+
+    source_prefix = os.path.basename(entry_dir).split(f"-v{CACHE_VERSION}-")[0] + "-v"
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(source_prefix) and path != entry_dir:
+            shutil.rmtree(path, ignore_errors=True)
+
+# Return all DrugBank tables, reading them from the cache when the XML file is unchanged.
+# On a cache miss the XML is parsed by `workers` processes when more than one is requested.
+def load_tables(file_path, cache_dir=None, use_hash=False, stream=False, workers=1):
+    entry_dir = cache_entry_dir(file_path, cache_dir, use_hash)
+    if os.path.isdir(entry_dir):
+        with span("cache_read"):
+            return read_tables(entry_dir)
+
+    if workers != 1:
+        tables = extract_tables_parallel(file_path, workers)
+    else:
+        tables = extract_tables(file_path, stream=stream)
+    with span("cache_write"):
+        write_tables(tables, entry_dir)
+    return tables
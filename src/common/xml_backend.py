@@ -0,0 +1,89 @@
+import importlib.util
+import os
+import xml.etree.ElementTree as ET
+
+# lxml is optional: it parses in C and evaluates precompiled XPath expressions,
+# and every parser falls back to xml.etree.ElementTree without it.
+HAVE_LXML = importlib.util.find_spec("lxml") is not None
+
+# Parser backend, "lxml" or "etree"; set DRUGBANK_XML_BACKEND=etree to force ElementTree.
+BACKEND = os.environ.get("DRUGBANK_XML_BACKEND") or ("lxml" if HAVE_LXML else "etree")
+
+if HAVE_LXML:
+    from lxml import etree
+
+# Compiled XPath expressions by (path, namespaces).
+XPATHS = {}
+
+# Keyword arguments of the lxml parsers. ElementTree drops comments and processing
+# instructions, so lxml does too, and huge_tree lifts the size limits for large releases.
+LXML_OPTIONS = {"remove_comments": True, "remove_pis": True, "huge_tree": True}
+
+def use_lxml():
+    if BACKEND == "lxml" and not HAVE_LXML:
+        raise ImportError("DRUGBANK_XML_BACKEND=lxml requires the lxml package")
+    return BACKEND == "lxml"
+
+# Parse an XML file into a tree with getroot(), like ET.parse.
+def parse_xml(file_path):
+    if use_lxml():
+        return etree.parse(file_path, etree.XMLParser(**LXML_OPTIONS))
+    return ET.parse(file_path)
+
+# Parse XML bytes into the root element, like ET.fromstring.
+def fromstring(data):
+    if use_lxml():
+        return etree.fromstring(data, etree.XMLParser(**LXML_OPTIONS))
+    return ET.fromstring(data)
+
+# Yield the direct children of the root element with a given tag while streaming
+# an XML file; each one is cleared and detached once the caller moves on.
+def iter_top_level(file_path, tag):
+    if use_lxml():
+        # lxml only reports elements with the tag, so no events are needed for the rest.
+        for _, elem in etree.iterparse(file_path, events=("end",), tag=tag, **LXML_OPTIONS):
+            parent = elem.getparent()
+            # Skip nested elements with the same tag, e.g. the <drug> entries of pathways.
+            if parent is not None and parent.getparent() is None:
+                yield elem
+                elem.clear()
+                parent.remove(elem)
+        return
+
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1 and elem.tag == tag:
+            yield elem
+            elem.clear()
+            root.remove(elem)
+
+# Return the XPath expression for an ElementPath path; the paths used by the parsers
+# (child steps, .//, [@attr='value']) mean the same in both languages.
+def compile_path(path, ns):
+    key = (path, tuple(ns.items()))
+    xpath = XPATHS.get(key)
+    if xpath is None:
+        xpath = XPATHS[key] = etree.XPath(path, namespaces=ns)
+    return xpath
+
+# Return the first subelement matching a path, like elem.find(path, ns).
+# ElementTree elements use ElementPath; lxml elements use a precompiled XPath,
+# which is faster than lxml's own find.
+def find(elem, path, ns):
+    if type(elem) is ET.Element:
+        return elem.find(path, ns)
+    matches = compile_path(path, ns)(elem)
+    return matches[0] if matches else None
+
+# Return all subelements matching a path, like elem.findall(path, ns).
+def findall(elem, path, ns):
+    if type(elem) is ET.Element:
+        return elem.findall(path, ns)
+    return compile_path(path, ns)(elem)
@@ -0,0 +1,171 @@
+import argparse
+import importlib.util
+import os
+
+import pandas as pd
+
+from common.drug_index import DrugLookup
+from common.instrumentation import span, count, profiling
+from common.drugbank_tables import extract_tables, pathway_records, TARGET_COLUMNS
+from common.sharded_parse import extract_tables_parallel
+from common.table_cache import load_tables
+from subtask_02.subtask_02 import display_synonym_graph
+from subtask_05.subtask_05 import display_graph
+from subtask_06.subtask_06 import build_drug_pathway_counts, display_histogram
+from subtask_08.subtask_08 import prepare_location_chart_data, create_donut_chart as create_location_chart
+from subtask_09.subtask_09 import build_drug_status, count_drug_statuses, create_donut_chart as create_status_chart
+from subtask_11.subtask_11 import find_drugs_for_gene, build_gene_dataframe, plot_gene_network
+from subtask_12.subtask_12 import drugs_from_tables, fetch_uniprot_details, UniProtCache
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The Parquet table cache needs pyarrow; without it the XML is always parsed.
+USE_TABLE_CACHE = importlib.util.find_spec("pyarrow") is not None
+
+# Save a DataFrame as CSV inside the directory of a subtask.
+def save_csv(df, subtask, filename):
+    csv_path = os.path.join(SRC_DIR, subtask, filename)
+    with span("csv_write"):
+        df.to_csv(csv_path, index=False)
+        count("csv_rows", len(df))
+    print(f"CSV saved as: {csv_path}")
+
+# Run the analysis of subtasks 01-12 on tables from a single pass over the XML.
+# With use_cache=True the tables are read from the Parquet cache while the XML file is unchanged,
+# if pyarrow is installed.
+# With workers other than 1 the XML is parsed by a pool of processes (None uses every core).
+def run_analysis(file_path, show_plots=False, gene=None, drugbank_id=None, use_cache=True, workers=1):
+    with span("load_tables"):
+        if use_cache and USE_TABLE_CACHE:
+            tables = load_tables(file_path, workers=workers)
+        elif workers != 1:
+            tables = extract_tables_parallel(file_path, workers)
+        else:
+            tables = extract_tables(file_path)
+    # Row ranges of every drug in the tables queried by drugbank_id below; without a
+    # DrugBank ID nothing is looked up, so nothing is indexed.
+    lookup = None
+    if drugbank_id:
+        with span("index_build"):
+            queried = ["drugs", "synonyms"] if show_plots else ["drugs"]
+            lookup = DrugLookup({table: tables[table] for table in queried})
+
+    # Subtask 01: drugs.
+    with span("subtask_01"):
+        print(tables["drugs"])
+        save_csv(tables["drugs"], "subtask_01", "drug_data.csv")
+
+    # Subtask 02: synonyms.
+    with span("subtask_02"):
+        print(tables["synonyms"])
+        save_csv(tables["synonyms"], "subtask_02", "drugbank_drugs.csv")
+        if show_plots and drugbank_id:
+            with span("plot"):
+                display_synonym_graph(drugbank_id, tables["synonyms"], lookup.indexes["synonyms"])
+
+    # Subtask 03: pharma products.
+    with span("subtask_03"):
+        print(tables["products"])
+        save_csv(tables["products"], "subtask_03", "pharma_products.csv")
+
+    # Subtasks 04 and 05: pathways.
+    with span("subtask_04_05"):
+        df_pathways = tables["pathways"]
+        print(df_pathways[["id", "pathway_name", "category"]])
+        print(f"\nTotal number of pathways: {len(df_pathways)}")
+        if show_plots:
+            with span("plot"):
+                display_graph(df_pathways)
+
+    # Subtask 06: pathways per drug.
+    with span("subtask_06"):
+        drug_counts = build_drug_pathway_counts(pathway_records(tables))
+        print("Drug: pathway count:")
+        for drug, pathway_count in sorted(drug_counts.items(), key=lambda x: x[1], reverse=True):
+            print(f"{drug}: {pathway_count}")
+        if show_plots and drug_counts:
+            with span("plot"):
+                display_histogram(drug_counts)
+
+    # Subtasks 07 and 08: targets and their cellular locations.
+    with span("subtask_07_08"):
+        df_targets = tables["targets"][TARGET_COLUMNS]
+        print(df_targets)
+        save_csv(df_targets, "subtask_07", "targets_info.csv")
+        if show_plots:
+            with span("plot"):
+                labels, values = prepare_location_chart_data(df_targets)
+                create_location_chart(labels, values, "The percentage occurrence of targets in different parts of the cell")
+
+    # Subtask 09: drug status.
+    with span("subtask_09"):
+        df_status, approved_not_withdrawn = count_drug_statuses(build_drug_status(tables["groups"]["groups"]))
+        print(df_status)
+        print("Approved but not withdrawn:", approved_not_withdrawn)
+        if show_plots:
+            with span("plot"):
+                create_status_chart(list(df_status["Status"]), list(df_status["Count"]),
+                                    "Drug Status Distribution (Sorted Ascending by Percentage)")
+
+    # Subtask 10: drug interactions.
+    with span("subtask_10"):
+        print(tables["interactions"])
+        save_csv(tables["interactions"], "subtask_10", "drug_interactions.csv")
+
+    # Subtask 11: drugs and products for a gene.
+    if gene:
+        with span("subtask_11"):
+            gene, drugs = find_drugs_for_gene(tables, gene)
+            df_gene = build_gene_dataframe(gene, drugs)
+            print(df_gene)
+            save_csv(df_gene, "subtask_11", "drugbank_gene_interactions.csv")
+            if show_plots:
+                with span("plot"):
+                    plot_gene_network(df_gene, gene)
+
+    # Subtask 12: UniProt details for a drug.
+    if drugbank_id:
+        with span("subtask_12"):
+            # drugs_from_tables keeps the row order of the drugs table.
+            df = drugs_from_tables(tables)
+            df_filtered = lookup.indexes["drugs"].rows(df, drugbank_id).reset_index(drop=True)
+            if df_filtered.empty:
+                print(f"No drug found with drugbank id: {drugbank_id}")
+            else:
+                uniprot_id = df_filtered.loc[0, "uniprot_id"]
+                if uniprot_id:
+                    cache = UniProtCache()
+                    details = fetch_uniprot_details(uniprot_id, cache)
+                    cache.close()
+                else:
+                    details = {"function": "", "subcellular_location": ""}
+                df_filtered = pd.concat([df_filtered, pd.DataFrame([details])], axis=1)
+                print(df_filtered.iloc[0])
+                save_csv(df_filtered, "subtask_12", "drug_data_with_uniprot_details.csv")
+
+    return tables
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run subtasks 01-12 on a single parse of the DrugBank XML file.")
+    # Optional: pass drugbank_partial_and_generated.xml to use the extended XML file.
+    parser.add_argument("file_path", nargs="?", default=os.path.join(SRC_DIR, "drugbank_partial.xml"))
+    parser.add_argument("--plots", action="store_true", help="show the charts of the subtasks")
+    parser.add_argument("--gene", help="gene name for subtask 11")
+    parser.add_argument("--drug-id", help="DrugBank ID for subtasks 02 and 12")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse the XML file")
+    parser.add_argument("--workers", type=int, default=1, help="number of parser processes (0 uses every core)")
+    parser.add_argument("--profile", help="write per-stage timings, memory peaks and counters to this file")
+    parser.add_argument("--profile-format", choices=["json", "chrome"], default="json",
+                        help="profile as plain JSON or as a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="profile timings without memory tracing")
+    args = parser.parse_args()
+
+    if args.profile:
+        with profiling(trace_memory=not args.no_tracemalloc) as profiler:
+            run_analysis(args.file_path, show_plots=args.plots, gene=args.gene, drugbank_id=args.drug_id,
+                         use_cache=not args.no_cache, workers=args.workers or None)
+        profiler.write(args.profile, chrome=args.profile_format == "chrome")
+        print(f"Profile saved as: {args.profile}")
+    else:
+        run_analysis(args.file_path, show_plots=args.plots, gene=args.gene, drugbank_id=args.drug_id,
+                     use_cache=not args.no_cache, workers=args.workers or None)
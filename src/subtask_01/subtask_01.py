@@ -1,44 +1,55 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.drugbank_xml import iter_drugs
+from common.xml_backend import parse_xml, find, findall
+
 # Function to parse the DrugBank XML file and create a DataFrame of pharma products.
-def parse_drugbank_xml(file_path):
+# With stream=True drugs are read one at a time instead of building the whole tree.
+def parse_drugbank_xml(file_path, stream=False):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+    if stream:
+        drug_elems = iter_drugs(file_path, ns)
+    else:
+        tree = parse_xml(file_path)
+        root = tree.getroot()
+        drug_elems = findall(root, "db:drug", ns)
     drugs = []
     
     # Iterate over each drug element.
-    for drug in root.findall("db:drug", ns):
+    for drug in drug_elems:
         # Unique drug identifier 
-        id_elem = drug.find("db:drugbank-id[@primary='true']", ns)
+        id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
         drug_id = id_elem.text if id_elem is not None else None
 
         # Drug name
-        name_elem = drug.find("db:name", ns)
+        name_elem = find(drug, "db:name", ns)
         name = name_elem.text if name_elem is not None else None
 
         # Drug type
         drug_type = drug.attrib.get("type", None)
 
         # Drug description
-        description_elem = drug.find("db:description", ns)
+        description_elem = find(drug, "db:description", ns)
         description = description_elem.text if description_elem is not None else None
 
         # Drug state
-        state_elem = drug.find("db:state", ns)
+        state_elem = find(drug, "db:state", ns)
         state = state_elem.text if state_elem is not None else None
 
         # Indications
-        indication_elem = drug.find("db:indication", ns)
+        indication_elem = find(drug, "db:indication", ns)
         indications = indication_elem.text if indication_elem is not None else None
 
         # Mechanism of action
-        mechanism_elem = drug.find("db:mechanism-of-action", ns)
+        mechanism_elem = find(drug, "db:mechanism-of-action", ns)
         mechanism = mechanism_elem.text if mechanism_elem is not None else None
 
         # Food interactions
-        food_elem = drug.find("db:food-interactions", ns)
+        food_elem = find(drug, "db:food-interactions", ns)
         food_interactions = food_elem.text if food_elem is not None else None
 
         drugs.append({
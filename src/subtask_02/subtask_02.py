@@ -1,27 +1,35 @@
-import xml.etree.ElementTree as ET
+import os
+import re
+import sys
+import unicodedata
+import numpy as np
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and return a DataFrame.
 def parse_drugbank_xml(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
     drugs = []
 
     # Loop over each drug element.
-    for drug in root.findall("db:drug", ns):
+    for drug in findall(root, "db:drug", ns):
         # Drug identifier.
-        id_elem = drug.find("db:drugbank-id[@primary='true']", ns)
+        id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
         drug_id = id_elem.text if id_elem is not None else None
 
         # Drug name.
-        name_elem = drug.find("db:name", ns)
+        name_elem = find(drug, "db:name", ns)
         name = name_elem.text if name_elem is not None else None
 
         # Drug synonyms.
-        synonyms = [elem.text for elem in drug.findall("db:synonyms/db:synonym", ns)]
+        synonyms = [elem.text for elem in findall(drug, "db:synonyms/db:synonym", ns)]
 
         drugs.append({
             "drug_id": drug_id,
@@ -31,10 +39,99 @@ def parse_drugbank_xml(file_path):
 
     return pd.DataFrame(drugs)
 
+# Normalize a drug name or synonym: Unicode-compatible, case-folded, punctuation as single spaces.
+def normalize_name(text):
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(re.sub(r"[\W_]+", " ", text).split())
+
+# Return the character n-grams of a normalized name, padded so word boundaries count too.
+def name_ngrams(name, n=3):
+    padded = f" {name} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+# Resolution index from drug names and synonyms to DrugBank IDs.
+# Exact matches of the normalized text come from a hash table; other names are
+# matched fuzzily by the share of character n-grams they have in common.
+class SynonymIndex:
+    def __init__(self, names, name_drug_ids, n=3):
+        self.n = n
+        # Distinct normalized names, the DrugBank IDs of each and a hash table over them.
+        self.names = names
+        self.name_drug_ids = name_drug_ids
+        self.exact = {name: i for i, name in enumerate(names)}
+        self.name_sizes = np.array([len(name_ngrams(name, n)) for name in names], dtype=np.int32)
+
+        # Posting lists: n-gram -> positions of the names containing it.
+        postings = {}
+        for i, name in enumerate(names):
+            for gram in name_ngrams(name, n):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    # Return ranked (drug_id, score) pairs for a raw name; an exact match scores 1.0.
+    # Fuzzy scores are the Dice coefficient of the n-gram sets.
+    def resolve(self, text, limit=5, min_score=0.5):
+        name = normalize_name(text)
+        if not name:
+            return []
+        if name in self.exact:
+            return [(drug_id, 1.0) for drug_id in self.name_drug_ids[self.exact[name]]][:limit]
+
+        grams = name_ngrams(name, self.n)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return []
+        candidates, shared = np.unique(np.concatenate(lists), return_counts=True)
+        scores = 2 * shared / (len(grams) + self.name_sizes[candidates])
+        keep = scores >= min_score
+        candidates, scores = candidates[keep], scores[keep]
+
+        results = []
+        seen = set()
+        for i in np.argsort(-scores, kind="stable"):
+            for drug_id in self.name_drug_ids[candidates[i]]:
+                if drug_id not in seen:
+                    seen.add(drug_id)
+                    results.append((drug_id, float(scores[i])))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    # Resolve many raw names to their best DrugBank ID (None if unresolved).
+    # Repeated names are resolved once.
+    def resolve_batch(self, texts, min_score=0.5):
+        resolved = {}
+        for text in texts:
+            if text not in resolved:
+                matches = self.resolve(text, limit=1, min_score=min_score)
+                resolved[text] = matches[0][0] if matches else None
+        return [resolved[text] for text in texts]
+
+# Build the resolution index over the names and synonyms of the DataFrame from parse_drugbank_xml.
+def build_synonym_index(df, n=3):
+    drug_ids_by_name = {}
+    for drug_id, name, synonyms in zip(df["drug_id"], df["name"], df["synonyms"]):
+        if not isinstance(drug_id, str):
+            continue
+        for text in [name] + list(synonyms):
+            key = normalize_name(text)
+            if key:
+                ids = drug_ids_by_name.setdefault(key, [])
+                if drug_id not in ids:
+                    ids.append(drug_id)
+    return SynonymIndex(list(drug_ids_by_name), list(drug_ids_by_name.values()), n)
+
 # Create and display a synonyms graph.
-def display_synonym_graph(drugbank_id, df):
+# Pass a DrugIdIndex of df (common/drug_index.py) to find the drug without scanning the table;
+# building one only pays off when it serves many lookups.
+def display_synonym_graph(drugbank_id, df, index=None):
     # Find drug record by DrugBank ID.
-    drug_record = df[df['drug_id'] == drugbank_id]
+    if index is None:
+        drug_record = df[df['drug_id'] == drugbank_id]
+    else:
+        drug_record = index.rows(df, drugbank_id)
     if drug_record.empty:
         print(f"No drug found with DrugBank ID: {drugbank_id}")
         return
@@ -75,6 +172,12 @@ if __name__ == '__main__':
     # Save the DataFrame to a CSV file.
     df.to_csv('drugbank_drugs.csv', index=False)
 
-    # Prompt user for a DrugBank ID and display its graph.
-    drugbank_id_input = input("Enter DrugBank ID: ").strip()
+    # Prompt user for a DrugBank ID or a drug name or synonym and display its graph.
+    drugbank_id_input = input("Enter DrugBank ID or drug name: ").strip()
+    if not (df['drug_id'] == drugbank_id_input).any():
+        matches = build_synonym_index(df).resolve(drugbank_id_input)
+        for drug_id, score in matches:
+            print(f"{drug_id}: {score:.2f}")
+        if matches:
+            drugbank_id_input = matches[0][0]
     display_synonym_graph(drugbank_id_input, df)
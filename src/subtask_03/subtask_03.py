@@ -1,50 +1,61 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.drugbank_xml import iter_drugs
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and return a DataFrame of pharma products.
-def parse_pharma_products(file_path):
+# With stream=True drugs are read one at a time instead of building the whole tree.
+def parse_pharma_products(file_path, stream=False):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+    if stream:
+        drugs = iter_drugs(file_path, ns)
+    else:
+        tree = parse_xml(file_path)
+        root = tree.getroot()
+        drugs = findall(root, "db:drug", ns)
     products_list = []
 
     # Loop over each drug element.
-    for drug in root.findall("db:drug", ns):
+    for drug in drugs:
         # Get primary DrugBank ID.
-        id_elem = drug.find("db:drugbank-id[@primary='true']", ns)
+        id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
         drug_id = id_elem.text if id_elem is not None else None
 
         # Parse products for the drug.
-        products = drug.find("db:products", ns)
+        products = find(drug, "db:products", ns)
         if products is not None:
-            for prod in products.findall("db:product", ns):
+            for prod in findall(products, "db:product", ns):
                 # Get product name.
-                prod_name_elem = prod.find("db:name", ns)
+                prod_name_elem = find(prod, "db:name", ns)
                 product_name = prod_name_elem.text if prod_name_elem is not None else None
 
                 # Get producer.
-                labeller_elem = prod.find("db:labeller", ns)
+                labeller_elem = find(prod, "db:labeller", ns)
                 producer = labeller_elem.text if labeller_elem is not None else None
 
                 # Get NDC product code.
-                ndc_elem = prod.find("db:ndc-product-code", ns)
+                ndc_elem = find(prod, "db:ndc-product-code", ns)
                 ndc = ndc_elem.text if ndc_elem is not None else None
 
                 # Get dosage form.
-                dosage_elem = prod.find("db:dosage-form", ns)
+                dosage_elem = find(prod, "db:dosage-form", ns)
                 dosage_form = dosage_elem.text if dosage_elem is not None else None
 
                 # Get route of administration.
-                route_elem = prod.find("db:route", ns)
+                route_elem = find(prod, "db:route", ns)
                 route = route_elem.text if route_elem is not None else None
 
                 # Get strength.
-                strength_elem = prod.find("db:strength", ns)
+                strength_elem = find(prod, "db:strength", ns)
                 strength = strength_elem.text if strength_elem is not None else None
 
                 # Determine regulatory agency based on available codes.
-                fda_elem = prod.find("db:fda-application-number", ns)
-                ema_elem = prod.find("db:ema-product-code", ns)
+                fda_elem = find(prod, "db:fda-application-number", ns)
+                ema_elem = find(prod, "db:ema-product-code", ns)
 
                 if fda_elem is not None and fda_elem.text and fda_elem.text.strip() != "":
                     country = "USA"
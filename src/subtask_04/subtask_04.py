@@ -1,29 +1,34 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and return a list of pathways.
 def parse_all_pathways(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
 
     pathways_list = []
 
     # Loop over each drug element.
-    for drug in root.findall("db:drug", ns):
-        pathways_elem = drug.find("db:pathways", ns)
+    for drug in findall(root, "db:drug", ns):
+        pathways_elem = find(drug, "db:pathways", ns)
         if pathways_elem is not None:
-            for pathway in pathways_elem.findall("db:pathway", ns):
+            for pathway in findall(pathways_elem, "db:pathway", ns):
                 # Get pathway identifier.
-                id_elem = pathway.find("db:smpdb-id", ns)
+                id_elem = find(pathway, "db:smpdb-id", ns)
                 pathway_id = id_elem.text if id_elem is not None else None
 
                 # Get pathway name.
-                name_elem = pathway.find("db:name", ns)
+                name_elem = find(pathway, "db:name", ns)
                 pathway_name = name_elem.text if name_elem is not None else None
 
                 # Get pathway category.
-                cat_elem = pathway.find("db:category", ns)
+                cat_elem = find(pathway, "db:category", ns)
                 pathway_category = cat_elem.text if cat_elem is not None else None
 
                 pathways_list.append({
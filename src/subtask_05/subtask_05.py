@@ -1,40 +1,51 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
+import numpy as np
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.pathway_matrix import build_pathway_matrix
+from common.xml_backend import parse_xml, find, findall
+
+# Graphs with more nodes than this are drawn by display_large_graph.
+LARGE_GRAPH_THRESHOLD = 200
 
 # Parse DrugBank XML and return a list of pathways.
 def parse_all_pathways(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
     pathways_list = []
 
     # Loop over each drug element.
-    for drug in root.findall("db:drug", ns):
-        pathways_elem = drug.find("db:pathways", ns)
+    for drug in findall(root, "db:drug", ns):
+        pathways_elem = find(drug, "db:pathways", ns)
         if pathways_elem is not None:
-            for pathway in pathways_elem.findall("db:pathway", ns):
+            for pathway in findall(pathways_elem, "db:pathway", ns):
                 # Get pathway identifier.
-                id_elem = pathway.find("db:smpdb-id", ns)
+                id_elem = find(pathway, "db:smpdb-id", ns)
                 pathway_id = id_elem.text if id_elem is not None else None
 
                 # Get pathway name.
-                name_elem = pathway.find("db:name", ns)
+                name_elem = find(pathway, "db:name", ns)
                 pathway_name = name_elem.text if name_elem is not None else None
 
                 # Get pathway category.
-                category_elem = pathway.find("db:category", ns)
+                category_elem = find(pathway, "db:category", ns)
                 pathway_category = category_elem.text if category_elem is not None else None
 
                 # Parse drug IDs and names in the pathway.
                 drug_ids = []
                 drug_names = []
-                drugs_elem = pathway.find("db:drugs", ns)
+                drugs_elem = find(pathway, "db:drugs", ns)
                 if drugs_elem is not None:
-                    for drug_item in drugs_elem.findall("db:drug", ns):
-                        d_id_elem = drug_item.find("db:drugbank-id", ns)
-                        d_name_elem = drug_item.find("db:name", ns)
+                    for drug_item in findall(drugs_elem, "db:drug", ns):
+                        d_id_elem = find(drug_item, "db:drugbank-id", ns)
+                        d_name_elem = find(drug_item, "db:name", ns)
                         if d_id_elem is not None:
                             drug_ids.append(d_id_elem.text)
                         if d_name_elem is not None:
@@ -50,8 +61,98 @@ def parse_all_pathways(file_path):
 
     return pathways_list
 
+# Build the pathway-drug incidence matrix (common/pathway_matrix.py) of the named pathways in the DataFrame.
+def pathway_matrix(df):
+    named = df['pathway_name'].map(lambda name: isinstance(name, str) and name != "")
+    return build_pathway_matrix(df.loc[named, ['pathway_name', 'drug_names']].to_dict('records'))
+
+# Return the distinct (pathway_name, drug_name) edges of the pathways DataFrame.
+def pathway_drug_edges(df):
+    matrix = pathway_matrix(df)
+    edges = matrix.matrix.tocoo()
+    return pd.DataFrame({'pathway_name': matrix.pathways[edges.row], 'drug_name': matrix.drugs[edges.col]})
+
+# Return the vertical slot of every node, ordered by degree (highest first).
+# Up to max_slots nodes get a slot each; above that the top `keep` nodes keep their own
+# slots and the remaining nodes are binned evenly into the other slots.
+def node_slots(degrees, max_slots, keep):
+    count = len(degrees)
+    ranks = np.arange(count)
+    if count <= max_slots:
+        return pd.Series(ranks, index=degrees.index), max(count, 1)
+    keep = min(keep, max_slots - 1)
+    bins = max_slots - keep
+    slots = np.where(ranks < keep, ranks, keep + (ranks - keep) * bins // (count - keep))
+    return pd.Series(slots, index=degrees.index), max_slots
+
+# Display a bipartite graph of pathways and drugs that stays fast and readable with many nodes.
+# Edges between the same pair of slots are merged into one line whose width grows with their
+# count, all lines are drawn as a single collection, and only the `label_count` nodes with the
+# highest degree on each side are labelled. A matrix already built by pathway_matrix(df) is reused.
+def display_large_graph(df, max_slots=100, label_count=15, matrix=None):
+    if matrix is None:
+        matrix = pathway_matrix(df)
+    pathway_degrees = pd.Series(matrix.pathway_degrees(), index=matrix.pathways)
+    pathway_degrees = pathway_degrees[pathway_degrees > 0].sort_values(ascending=False, kind='stable')
+    drug_degrees = pd.Series(matrix.drug_degrees(), index=matrix.drugs).sort_values(ascending=False, kind='stable')
+    pathway_slots, pathway_slot_count = node_slots(pathway_degrees, max_slots, label_count)
+    drug_slots, drug_slot_count = node_slots(drug_degrees, max_slots, label_count)
+
+    # Slots run from the top (1) to the bottom (0) of each column.
+    def slot_y(slots, slot_count):
+        return 1 - slots / max(slot_count - 1, 1)
+
+    # One segment per connected pair of slots; pathways without drugs have no slot and no edges.
+    edges = matrix.matrix.tocoo()
+    pathway_slot_codes = pathway_slots.reindex(matrix.pathways).fillna(-1).to_numpy(dtype=np.int64)
+    drug_slot_codes = drug_slots.reindex(matrix.drugs).to_numpy(dtype=np.int64)
+    weights = pd.DataFrame({
+        'pathway_slot': pathway_slot_codes[edges.row],
+        'drug_slot': drug_slot_codes[edges.col],
+    }).value_counts()
+    pathway_y = slot_y(weights.index.get_level_values('pathway_slot').to_numpy(), pathway_slot_count)
+    drug_y = slot_y(weights.index.get_level_values('drug_slot').to_numpy(), drug_slot_count)
+    segments = np.stack([np.column_stack([np.zeros(len(weights)), pathway_y]),
+                         np.column_stack([np.ones(len(weights)), drug_y])], axis=1)
+    widths = 0.3 + 2.7 * weights.to_numpy() / max(weights.max(), 1) if len(weights) else []
+
+    fig, ax = plt.subplots(figsize=(14, 10))
+    ax.add_collection(LineCollection(segments, linewidths=widths, colors='gray', alpha=0.4))
+
+    # Nodes; the marker size of a binned slot grows with the number of nodes in it.
+    for x, slots, slot_count, color, label in [(0, pathway_slots, pathway_slot_count, 'lightblue', 'Pathways'),
+                                               (1, drug_slots, drug_slot_count, 'lightgreen', 'Drugs')]:
+        members = np.bincount(slots.to_numpy(), minlength=slot_count)
+        occupied = np.flatnonzero(members)
+        ax.scatter(np.full(len(occupied), x), slot_y(occupied, slot_count), s=20 + 10 * np.sqrt(members[occupied]),
+                   c=color, edgecolors='black', linewidths=0.5, zorder=2, label=f"{label} ({len(slots)})")
+
+    # Labels for the nodes with the highest degree.
+    for x, degrees, slots, slot_count, align in [(-0.02, pathway_degrees, pathway_slots, pathway_slot_count, 'right'),
+                                                 (1.02, drug_degrees, drug_slots, drug_slot_count, 'left')]:
+        for node in degrees.index[:label_count]:
+            ax.text(x, slot_y(slots[node], slot_count), f"{node} ({degrees[node]})",
+                    ha=align, va='center', fontsize=8)
+
+    ax.set_xlim(-0.6, 1.6)
+    ax.set_ylim(-0.05, 1.05)
+    ax.set_title("Bipartite Graph of Pathways and Drugs", fontsize=14)
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, 0.02), markerscale=0.5, ncol=2)
+    ax.axis('off')
+    plt.tight_layout()
+    plt.show()
+
 # Display a bipartite graph of pathways and drugs.
-def display_graph(df):
+# Graphs above LARGE_GRAPH_THRESHOLD nodes use display_large_graph unless large=False.
+def display_graph(df, large=None):
+    matrix = None
+    if large is None:
+        matrix = pathway_matrix(df)
+        large = np.count_nonzero(matrix.pathway_degrees()) + len(matrix.drugs) > LARGE_GRAPH_THRESHOLD
+    if large:
+        display_large_graph(df, matrix=matrix)
+        return
+
     B = nx.Graph()
     # Add pathway nodes.
     pathway_nodes = set(df['pathway_name'].tolist())
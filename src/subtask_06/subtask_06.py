@@ -1,39 +1,46 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.pathway_matrix import build_pathway_matrix
+from common.aggregates import PathwayCounts, aggregate
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and return a list of pathways records.
 def parse_all_pathways(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
     pathways_list = []
 
     # Loop over each drug in the XML.
-    for drug in root.findall("db:drug", ns):
-        pathways_elem = drug.find("db:pathways", ns)
+    for drug in findall(root, "db:drug", ns):
+        pathways_elem = find(drug, "db:pathways", ns)
         if pathways_elem is not None:
-            for pathway in pathways_elem.findall("db:pathway", ns):
+            for pathway in findall(pathways_elem, "db:pathway", ns):
                 # Get pathway identifier.
-                id_elem = pathway.find("db:smpdb-id", ns)
+                id_elem = find(pathway, "db:smpdb-id", ns)
                 pathway_id = id_elem.text if id_elem is not None else None
 
                 # Get pathway name.
-                name_elem = pathway.find("db:name", ns)
+                name_elem = find(pathway, "db:name", ns)
                 pathway_name = name_elem.text if name_elem is not None else None
 
                 # Get pathway category.
-                cat_elem = pathway.find("db:category", ns)
+                cat_elem = find(pathway, "db:category", ns)
                 pathway_category = cat_elem.text if cat_elem is not None else None
 
                 # Collect associated drug IDs and names.
                 drug_ids = []
                 drug_names = []
-                drugs_elem = pathway.find("db:drugs", ns)
+                drugs_elem = find(pathway, "db:drugs", ns)
                 if drugs_elem is not None:
-                    for drug_item in drugs_elem.findall("db:drug", ns):
-                        d_id_elem = drug_item.find("db:drugbank-id", ns)
-                        d_name_elem = drug_item.find("db:name", ns)
+                    for drug_item in findall(drugs_elem, "db:drug", ns):
+                        d_id_elem = find(drug_item, "db:drugbank-id", ns)
+                        d_name_elem = find(drug_item, "db:name", ns)
                         if d_id_elem is not None:
                             drug_ids.append(d_id_elem.text)
                         if d_name_elem is not None:
@@ -50,21 +57,15 @@ def parse_all_pathways(file_path):
     return pathways_list
 
 # Build a mapping from drug to count of associated pathways.
-def build_drug_pathway_counts(pathways):
-    drug_to_pathways = {}
-
-    # Loop over each pathway record.
-    for record in pathways:
-        p_identifier = record.get("pathway_name")
-        # Add pathway name for each drug in the record.
-        for drug in record.get("drug_names", []):
-            if drug:
-                if drug not in drug_to_pathways:
-                    drug_to_pathways[drug] = set()
-                drug_to_pathways[drug].add(p_identifier)
+# Drugs are keyed by name, or by DrugBank ID with key="drug_ids".
+# The counts are column sums of the pathway-drug incidence matrix (common/pathway_matrix.py).
+def build_drug_pathway_counts(pathways, key="drug_names"):
+    return build_pathway_matrix(pathways, key).drug_pathway_counts()
 
-    drug_counts = {drug: len(pathways) for drug, pathways in drug_to_pathways.items()}
-    return drug_counts
+# Count pathways per drug in a single streaming pass, without collecting the pathway records.
+def count_drug_pathways(file_path, key="drug_names"):
+    counts, = aggregate(file_path, [PathwayCounts(key)])
+    return counts.result()
 
 # Display a histogram of the number of pathways per drug.
 def display_histogram(drug_counts):
@@ -86,11 +87,8 @@ if __name__ == '__main__':
     # Optional: Uncomment to use the extended XML file.
     # file_path = '../drugbank_partial_and_generated.xml'
 
-    # Parse the pathways from the XML.
-    pathways = parse_all_pathways(file_path)
-    
-    # Build and print drug to pathway count mapping.
-    drug_counts = build_drug_pathway_counts(pathways)
+    # Build and print drug to pathway count mapping while streaming the XML file.
+    drug_counts = count_drug_pathways(file_path)
     print("Drug: pathway count:")
     for drug, count in sorted(drug_counts.items(), key=lambda x: x[1], reverse=True):
         print(f"{drug}: {count}")
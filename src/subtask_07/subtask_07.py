@@ -1,21 +1,38 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.drugbank_xml import iter_drugs, get_text, primary_ids
+from common.xml_backend import parse_xml, find, findall
+
+# Columns of the normalized target store built by parse_target_store.
+POLYPEPTIDE_COLUMNS = ["Polypeptide_key", "External_ID", "Source", "Polypeptide_name", "Gene_name",
+                       "GenAtlas_ID", "Chromosome", "Cellular_location"]
+DRUG_TARGET_COLUMNS = ["Drug_ID", "DrugBank_ID", "External_ID", "Polypeptide_key"]
+EXTERNAL_IDENTIFIER_COLUMNS = ["Polypeptide_key", "External_ID", "Resource", "Identifier"]
+
 # Parse DrugBank XML to create a DataFrame of targets information.
-def parse_targets_info(file_path):
+# With stream=True drugs are read one at a time instead of building the whole tree.
+def parse_targets_info(file_path, stream=False):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+    if stream:
+        targets = (target for drug in iter_drugs(file_path, ns) for target in findall(drug, ".//db:target", ns))
+    else:
+        tree = parse_xml(file_path)
+        root = tree.getroot()
+        targets = findall(root, ".//db:target", ns)
 
     targets_data = []
     # Loop over each target element.
-    for target in root.findall(".//db:target", ns):
+    for target in targets:
         # Get DrugBank target ID.
-        target_id_elem = target.find("db:id", ns)
+        target_id_elem = find(target, "db:id", ns)
         drugbank_id = target_id_elem.text.strip() if target_id_elem is not None and target_id_elem.text else None
 
         # Get polypeptide element.
-        polypep = target.find("db:polypeptide", ns)
+        polypep = find(target, "db:polypeptide", ns)
         if polypep is None:
             continue
 
@@ -24,29 +41,29 @@ def parse_targets_info(file_path):
         source = polypep.attrib.get("source")
 
         # Get polypeptide name.
-        pep_name_elem = polypep.find("db:name", ns)
+        pep_name_elem = find(polypep, "db:name", ns)
         polypeptide_name = pep_name_elem.text.strip() if pep_name_elem is not None and pep_name_elem.text else None
 
         # Get gene name.
-        gene_name_elem = polypep.find("db:gene-name", ns)
+        gene_name_elem = find(polypep, "db:gene-name", ns)
         gene_name = gene_name_elem.text.strip() if gene_name_elem is not None and gene_name_elem.text else None
 
         # Get chromosome location.
-        chrom_elem = polypep.find("db:chromosome-location", ns)
+        chrom_elem = find(polypep, "db:chromosome-location", ns)
         chromosome = chrom_elem.text.strip() if chrom_elem is not None and chrom_elem.text else None
 
         # Get cellular location.
-        cell_loc_elem = polypep.find("db:cellular-location", ns)
+        cell_loc_elem = find(polypep, "db:cellular-location", ns)
         cellular_location = cell_loc_elem.text.strip() if cell_loc_elem is not None and cell_loc_elem.text else None
 
         # Get GenAtlas ID.
         genatlas_id = None
-        ext_ids_elem = polypep.find("db:external-identifiers", ns)
+        ext_ids_elem = find(polypep, "db:external-identifiers", ns)
         if ext_ids_elem is not None:
-            for ext in ext_ids_elem.findall("db:external-identifier", ns):
-                resource_elem = ext.find("db:resource", ns)
+            for ext in findall(ext_ids_elem, "db:external-identifier", ns):
+                resource_elem = find(ext, "db:resource", ns)
                 if resource_elem is not None and resource_elem.text.strip() == "GenAtlas":
-                    identifier_elem = ext.find("db:identifier", ns)
+                    identifier_elem = find(ext, "db:identifier", ns)
                     if identifier_elem is not None and identifier_elem.text:
                         genatlas_id = identifier_elem.text.strip()
                         break
@@ -64,6 +81,77 @@ def parse_targets_info(file_path):
 
     return pd.DataFrame(targets_data)
 
+# Parse DrugBank XML into a normalized target store of three tables:
+#  - polypeptides: one row per polypeptide, keyed by its row number in Polypeptide_key,
+#  - drug_targets: one row per target of a drug, pointing to its polypeptide,
+#  - external_identifiers: every external identifier of every polypeptide.
+# A polypeptide targeted by many drugs is parsed and stored only the first time its external ID
+# is seen; a polypeptide without an ID gets a row of its own for every target.
+def parse_target_store(file_path, stream=False):
+    ns = {'db': 'http://www.drugbank.ca'}
+    if stream:
+        drugs = iter_drugs(file_path, ns)
+    else:
+        drugs = findall(parse_xml(file_path).getroot(), "db:drug", ns)
+
+    polypeptides = {}
+    polypeptide_rows = []
+    drug_targets = []
+    external_identifiers = []
+    for drug in drugs:
+        _, drug_id = primary_ids(drug, ns)
+        for target in findall(drug, "db:targets/db:target", ns):
+            polypep = find(target, "db:polypeptide", ns)
+            if polypep is None:
+                continue
+            external_id = polypep.attrib.get("id")
+            # Polypeptides without an ID are never shared, so they are keyed by target.
+            seen = external_id is not None and external_id in polypeptides
+            key = polypeptides[external_id]["Polypeptide_key"] if seen else len(polypeptide_rows)
+            drug_targets.append({
+                "Drug_ID": drug_id,
+                "DrugBank_ID": get_text(target, "db:id", ns),
+                "External_ID": external_id,
+                "Polypeptide_key": key
+            })
+            if seen:
+                continue
+
+            genatlas_id = None
+            for ext in findall(polypep, "db:external-identifiers/db:external-identifier", ns):
+                resource = get_text(ext, "db:resource", ns)
+                identifier = get_text(ext, "db:identifier", ns)
+                external_identifiers.append({"Polypeptide_key": key, "External_ID": external_id,
+                                             "Resource": resource, "Identifier": identifier})
+                if resource == "GenAtlas" and identifier and genatlas_id is None:
+                    genatlas_id = identifier
+
+            row = {
+                "Polypeptide_key": key,
+                "External_ID": external_id,
+                "Source": polypep.attrib.get("source"),
+                "Polypeptide_name": get_text(polypep, "db:name", ns),
+                "Gene_name": get_text(polypep, "db:gene-name", ns),
+                "GenAtlas_ID": genatlas_id,
+                "Chromosome": get_text(polypep, "db:chromosome-location", ns),
+                "Cellular_location": get_text(polypep, "db:cellular-location", ns)
+            }
+            polypeptide_rows.append(row)
+            if external_id is not None:
+                polypeptides[external_id] = row
+
+    return {
+        "polypeptides": pd.DataFrame(polypeptide_rows, columns=POLYPEPTIDE_COLUMNS),
+        "drug_targets": pd.DataFrame(drug_targets, columns=DRUG_TARGET_COLUMNS),
+        "external_identifiers": pd.DataFrame(external_identifiers, columns=EXTERNAL_IDENTIFIER_COLUMNS)
+    }
+
+# Join the target store back into one row per target, with the columns of parse_targets_info.
+def denormalize_targets(store):
+    df = store["drug_targets"].drop(columns="External_ID").merge(store["polypeptides"], on="Polypeptide_key", how="left")
+    return df[["DrugBank_ID", "Source", "External_ID", "Polypeptide_name", "Gene_name",
+               "GenAtlas_ID", "Chromosome", "Cellular_location"]]
+
 if __name__ == "__main__":
     # Path to the DrugBank XML file.
     file_path = "../drugbank_partial.xml"
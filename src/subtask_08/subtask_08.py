@@ -1,21 +1,27 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.aggregates import LocationCounts, aggregate
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and return a DataFrame with cellular location information for targets.
 def parse_targets_info(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
 
     targets_data = []
-    for target in root.findall('.//db:target', ns):
-        polypep = target.find('db:polypeptide', ns)
+    for target in findall(root, './/db:target', ns):
+        polypep = find(target, 'db:polypeptide', ns)
         if polypep is None:
             continue
 
-        cell_loc_elem = polypep.find('db:cellular-location', ns)
+        cell_loc_elem = find(polypep, 'db:cellular-location', ns)
         cellular_location = cell_loc_elem.text.strip() if cell_loc_elem is not None and cell_loc_elem.text else None
 
         targets_data.append({
@@ -24,6 +30,26 @@ def parse_targets_info(file_path):
 
     return pd.DataFrame(targets_data)
 
+# Return labels and values of the top cellular locations, with the rest grouped as "Other".
+def prepare_location_chart_data(df, top_n=5):
+    return location_chart_data(df['Cellular_location'].value_counts().to_dict(), top_n)
+
+# Return chart labels and values from a mapping of location to count, most common first.
+def location_chart_data(location_counts, top_n=5):
+    counts = list(location_counts.items())
+    labels = [location for location, _ in counts[:top_n]]
+    values = [count for _, count in counts[:top_n]]
+    others = sum(count for _, count in counts[top_n:])
+    if others > 0:
+        labels.append("Other")
+        values.append(others)
+    return labels, values
+
+# Count targets per cellular location in a single streaming pass, without building a DataFrame.
+def count_locations(file_path):
+    counts, = aggregate(file_path, [LocationCounts()])
+    return counts.result()
+
 # Create a donut (ring) chart with percentages and labels outside the chart connected by arrows.
 def create_donut_chart(labels, values, title):
     fig, ax = plt.subplots(figsize=(14, 8), subplot_kw=dict(aspect="equal"))
@@ -70,16 +96,7 @@ if __name__ == "__main__":
     df.to_csv('targets_info.csv', index=False)
 
     # Prepare data for the donut chart: top 5 cellular locations, others grouped as "Other".
-    location_counts = df['Cellular_location'].value_counts()
-    top_n = 5
-    top_locations = location_counts[:top_n]
-    others = location_counts[top_n:].sum()
-
-    labels = list(top_locations.index)
-    values = list(top_locations.values)
-    if others > 0:
-        labels.append("Other")
-        values.append(others)
+    labels, values = prepare_location_chart_data(df)
 
     create_donut_chart(
         labels, values,
@@ -1,21 +1,48 @@
-import xml.etree.ElementTree as ET
+import os
+import ast
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.aggregates import StatusCounts, aggregate
+from common.drugbank_xml import iter_drugs
+from common.xml_backend import parse_xml, find, findall
+
+# Bit of every drug group in the packed per-drug group flags.
+GROUP_BITS = {
+    "approved": 1,
+    "withdrawn": 2,
+    "experimental": 4,
+    "investigational": 8,
+    "vet_approved": 16,
+    "illicit": 32,
+    "nutraceutical": 64
+}
+
 # Parse DrugBank XML and create a DataFrame with drug status information.
 def parse_drug_status(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
 
-    drugs_data = []
-    for drug in root.findall('.//db:drug', ns):
-        groups_elem = drug.find('db:groups', ns)
+    group_lists = []
+    for drug in findall(root, './/db:drug', ns):
+        groups_elem = find(drug, 'db:groups', ns)
         if groups_elem is not None:
-            groups = [grp.text.strip().lower() for grp in groups_elem.findall('db:group', ns) if grp.text]
+            groups = [grp.text.strip().lower() for grp in findall(groups_elem, 'db:group', ns) if grp.text]
         else:
             groups = []
+        group_lists.append(groups)
+
+    return build_drug_status(group_lists)
+
+# Create a DataFrame with drug status flags from lists of lowercase group names.
+def build_drug_status(group_lists):
+    drugs_data = []
+    for groups in group_lists:
         drugs_data.append({
             "approved": "approved" in groups,
             "withdrawn": "withdrawn" in groups,
@@ -23,7 +50,94 @@ def parse_drug_status(file_path):
             "vet_approved": "vet_approved" in groups
         })
 
-    return pd.DataFrame(drugs_data)
+    return pd.DataFrame(drugs_data, columns=["approved", "withdrawn", "experimental", "vet_approved"])
+
+# Count drugs in each status category and the approved drugs that were not withdrawn.
+def count_drug_statuses(df):
+    return status_table({
+        "approved": df['approved'].sum(),
+        "withdrawn": df['withdrawn'].sum(),
+        "experimental": df['experimental'].sum(),
+        "vet_approved": df['vet_approved'].sum(),
+        "approved_not_withdrawn": ((df['approved'] == True) & (df['withdrawn'] == False)).sum()
+    })
+
+# Build the sorted status table from status counts, as returned by StatusCounts.result().
+def status_table(counts):
+    status_counts = {
+        "Approved": counts["approved"],
+        "Withdrawn": counts["withdrawn"],
+        "Experimental/Investigational": counts["experimental"],
+        "Vet Approved": counts["vet_approved"]
+    }
+    df_status = pd.DataFrame(list(status_counts.items()), columns=["Status", "Count"])
+
+    # Sort the DataFrame by counts in ascending order.
+    df_status = df_status.sort_values(by="Count", ascending=True)
+    return df_status, counts["approved_not_withdrawn"]
+
+# Count drug statuses in a single streaming pass, without building a DataFrame.
+def count_drug_statuses_streaming(file_path):
+    counts, = aggregate(file_path, [StatusCounts()])
+    return status_table(counts.result())
+
+# Pack lists of lowercase group names into one uint8 bitmask per drug.
+def pack_group_flags(group_lists):
+    return np.fromiter((sum(GROUP_BITS.get(group, 0) for group in set(groups)) for groups in group_lists),
+                       dtype=np.uint8)
+
+# Parse the group flags of every drug while streaming the XML file.
+def parse_group_flags(file_path):
+    ns = {'db': 'http://www.drugbank.ca'}
+    return pack_group_flags([grp.text.strip().lower() for grp in findall(drug, 'db:groups/db:group', ns) if grp.text]
+                            for drug in iter_drugs(file_path, ns))
+
+# Evaluate a parsed query expression on an array of flags.
+def evaluate_query(node, flags):
+    if isinstance(node, ast.Expression):
+        return evaluate_query(node.body, flags)
+    if isinstance(node, ast.Name):
+        if node.id not in GROUP_BITS:
+            raise ValueError(f"Unknown drug group: {node.id}")
+        return (flags & GROUP_BITS[node.id]) != 0
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Invert, ast.Not)):
+        return ~evaluate_query(node.operand, flags)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr, ast.BitXor)):
+        left, right = evaluate_query(node.left, flags), evaluate_query(node.right, flags)
+        if isinstance(node.op, ast.BitAnd):
+            return left & right
+        if isinstance(node.op, ast.BitOr):
+            return left | right
+        return left ^ right
+    if isinstance(node, ast.BoolOp):
+        values = [evaluate_query(value, flags) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return combine.reduce(values)
+    raise ValueError(f"Unsupported query expression: {ast.unparse(node)}")
+
+# Return a boolean mask of the drugs matching a query of drug groups, for example
+# "approved & ~withdrawn" or "(experimental | investigational) and not illicit".
+# Every group name and operator is one vectorized pass over the flags.
+def query_groups(flags, expression):
+    return evaluate_query(ast.parse(expression, mode="eval"), flags)
+
+# Count the drugs matching each query.
+def count_groups(flags, *expressions):
+    return {expression: int(np.count_nonzero(query_groups(flags, expression))) for expression in expressions}
+
+# Group query of every count in the status table, evaluated on the packed group flags.
+STATUS_QUERIES = {
+    "approved": "approved",
+    "withdrawn": "withdrawn",
+    "experimental": "experimental | investigational",
+    "vet_approved": "vet_approved",
+    "approved_not_withdrawn": "approved & ~withdrawn"
+}
+
+# Build the sorted status table from the packed group flags of every drug.
+def status_table_from_flags(flags):
+    counts = count_groups(flags, *STATUS_QUERIES.values())
+    return status_table({status: counts[query] for status, query in STATUS_QUERIES.items()})
 
 # Create a donut chart with percentage labels and external annotations using arrows.
 def create_donut_chart(labels, counts, title):
@@ -69,30 +183,18 @@ if __name__ == "__main__":
     # Optional: uncomment to use the extended DrugBank XML file.
     file_path = '../drugbank_partial_and_generated.xml'
 
-    df = parse_drug_status(file_path)
-
-    # Count drugs in each category.
-    total_approved = df['approved'].sum()
-    total_withdrawn = df['withdrawn'].sum()
-    total_experimental = df['experimental'].sum()
-    total_vet = df['vet_approved'].sum()
-    approved_not_withdrawn = ((df['approved'] == True) & (df['withdrawn'] == False)).sum()
-
-    # Create a DataFrame with the required counts.
-    status_counts = {
-        "Approved": total_approved,
-        "Withdrawn": total_withdrawn,
-        "Experimental/Investigational": total_experimental,
-        "Vet Approved": total_vet
-    }
-    df_status = pd.DataFrame(list(status_counts.items()), columns=["Status", "Count"])
-    
-    # Sort the DataFrame by counts in ascending order.
-    df_status = df_status.sort_values(by="Count", ascending=True)
+    # Pack the groups of every drug in a single streaming pass and count each category.
+    flags = parse_group_flags(file_path)
+    df_status, approved_not_withdrawn = status_table_from_flags(flags)
     
     print(df_status)
     print("Approved but not withdrawn:", approved_not_withdrawn)
 
+    # Other status breakdowns from the same flags.
+    for expression, count in count_groups(flags, "approved & investigational", "illicit | nutraceutical",
+                                          "vet_approved & ~approved").items():
+        print(f"{expression}: {count}")
+
     # Prepare donut chart data and generate the chart.
     labels = list(df_status["Status"])
     counts = list(df_status["Count"])
@@ -1,54 +1,73 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
+import numpy as np
 import pandas as pd
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.drugbank_tables import INTERACTION_COLUMNS
+from common.drugbank_xml import iter_drugs
+from common.xml_backend import parse_xml, find, findall
+
 # Parse DrugBank XML and extract drug interactions information.
-def parse_drug_interactions(file_path):
+# With stream=True drugs are read one at a time instead of building the whole tree.
+def parse_drug_interactions(file_path, stream=False):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+    if stream:
+        # Streamed drugs are freed right away, so each drug's own name is used instead of a mapping.
+        drug_name_mapping = None
+        drugs = iter_drugs(file_path, ns)
+    else:
+        tree = parse_xml(file_path)
+        root = tree.getroot()
 
-    # Build a mapping from DrugBank ID to the drug's official name.
-    drug_name_mapping = {}
-    for drug in root.findall('.//db:drug', ns):
-        primary_id_elem = drug.find('db:drugbank-id[@primary="true"]', ns)
-        if primary_id_elem is None or not primary_id_elem.text:
-            primary_id_elem = drug.find('db:drugbank-id', ns)
-        drugbank_id = primary_id_elem.text.strip() if primary_id_elem is not None and primary_id_elem.text else None
+        # Build a mapping from DrugBank ID to the drug's official name.
+        drug_name_mapping = {}
+        for drug in findall(root, './/db:drug', ns):
+            primary_id_elem = find(drug, 'db:drugbank-id[@primary="true"]', ns)
+            if primary_id_elem is None or not primary_id_elem.text:
+                primary_id_elem = find(drug, 'db:drugbank-id', ns)
+            drugbank_id = primary_id_elem.text.strip() if primary_id_elem is not None and primary_id_elem.text else None
 
-        name_elem = drug.find('db:name', ns)
-        drug_name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
+            name_elem = find(drug, 'db:name', ns)
+            drug_name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
 
-        if drugbank_id:
-            drug_name_mapping[drugbank_id] = drug_name
+            if drugbank_id:
+                drug_name_mapping[drugbank_id] = drug_name
+        drugs = findall(root, './/db:drug', ns)
 
     interactions_data = []
     # Iterate again to process interactions.
-    for drug in root.findall('.//db:drug', ns):
-        primary_id_elem = drug.find('db:drugbank-id[@primary="true"]', ns)
+    for drug in drugs:
+        primary_id_elem = find(drug, 'db:drugbank-id[@primary="true"]', ns)
         if primary_id_elem is not None and primary_id_elem.text:
             drugbank_id = primary_id_elem.text.strip()
         else:
-            drugbank_id = drug.find('db:drugbank-id', ns).text.strip() if drug.find('db:drugbank-id', ns) is not None else None
+            drugbank_id = find(drug, 'db:drugbank-id', ns).text.strip() if find(drug, 'db:drugbank-id', ns) is not None else None
 
         # Get the official name for this main drug.
-        drug_official_name = drug_name_mapping.get(drugbank_id)
+        if drug_name_mapping is None:
+            name_elem = find(drug, 'db:name', ns)
+            drug_official_name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
+        else:
+            drug_official_name = drug_name_mapping.get(drugbank_id)
 
-        interactions_elem = drug.find('db:drug-interactions', ns)
+        interactions_elem = find(drug, 'db:drug-interactions', ns)
         if interactions_elem is not None:
-            for interaction in interactions_elem.findall('db:drug-interaction', ns):
+            for interaction in findall(interactions_elem, 'db:drug-interaction', ns):
                 # Get interacting drug info from attributes.
                 inter_drugbank_id = interaction.attrib.get('drugbank-id')
                 inter_drug_name = interaction.attrib.get('name')
                 
                 # If attributes are not available, try to get them from child elements.
                 if not inter_drugbank_id:
-                    id_elem = interaction.find('db:drugbank-id', ns)
+                    id_elem = find(interaction, 'db:drugbank-id', ns)
                     inter_drugbank_id = id_elem.text.strip() if (id_elem is not None and id_elem.text) else None
                 if not inter_drug_name:
-                    name_elem = interaction.find('db:name', ns)
+                    name_elem = find(interaction, 'db:name', ns)
                     inter_drug_name = name_elem.text.strip() if (name_elem is not None and name_elem.text) else None
 
-                desc_elem = interaction.find('db:description', ns)
+                desc_elem = find(interaction, 'db:description', ns)
                 description = desc_elem.text.strip() if desc_elem is not None and desc_elem.text else None
 
                 interactions_data.append({
@@ -61,6 +80,137 @@ def parse_drug_interactions(file_path):
 
     return pd.DataFrame(interactions_data)
 
+# Drug-drug interactions as a symmetric adjacency matrix in CSR form.
+# Drugs are encoded as integers by their position in the sorted drug_ids array; the
+# neighbours of drug i are indices[indptr[i]:indptr[i + 1]], sorted ascending.
+class InteractionIndex:
+    def __init__(self, drug_ids, indptr, indices):
+        self.drug_ids = drug_ids
+        self.indptr = indptr
+        self.indices = indices
+        # Sorted edge keys (row * drug count + column) for vectorized pair checks.
+        rows = np.repeat(np.arange(len(drug_ids), dtype=np.int64), np.diff(indptr))
+        self.edge_keys = rows * len(drug_ids) + indices
+
+    # Return integer codes of DrugBank IDs, -1 for IDs without interactions.
+    def encode(self, drugs):
+        drugs = np.asarray(drugs, dtype=str)
+        if len(self.drug_ids) == 0:
+            return np.full(len(drugs), -1, dtype=np.int64)
+        codes = np.searchsorted(self.drug_ids, drugs)
+        codes = np.minimum(codes, len(self.drug_ids) - 1)
+        return np.where(self.drug_ids[codes] == drugs, codes, -1).astype(np.int64)
+
+    # Return the DrugBank IDs interacting with a drug.
+    def neighbors(self, drug):
+        code = self.encode([drug])[0]
+        if code < 0:
+            return []
+        return self.drug_ids[self.indices[self.indptr[code]:self.indptr[code + 1]]].tolist()
+
+    # Return True if two drugs interact, by binary search in the first drug's neighbours.
+    def interacts(self, drug_a, drug_b):
+        code_a, code_b = self.encode([drug_a, drug_b])
+        if code_a < 0 or code_b < 0:
+            return False
+        row = self.indices[self.indptr[code_a]:self.indptr[code_a + 1]]
+        pos = np.searchsorted(row, code_b)
+        return bool(pos < len(row) and row[pos] == code_b)
+
+    # Return every interacting pair of a regimen, in regimen order.
+    # All pairs are checked at once against the sorted edge keys.
+    def regimen_interactions(self, drugs):
+        drugs = list(drugs)
+        if len(self.edge_keys) == 0:
+            return []
+        codes = self.encode(drugs)
+        first, second = np.triu_indices(len(drugs), k=1)
+        keys = codes[first] * len(self.drug_ids) + codes[second]
+        pos = np.minimum(np.searchsorted(self.edge_keys, keys), len(self.edge_keys) - 1)
+        found = (codes[first] >= 0) & (codes[second] >= 0) & (self.edge_keys[pos] == keys)
+        return [(drugs[i], drugs[j]) for i, j in zip(first[found], second[found])]
+
+# Build the interaction index from the DataFrame returned by parse_drug_interactions.
+# Every interaction is stored in both directions, so lookups do not depend on which drug lists it.
+def build_interaction_index(df_interactions):
+    pairs = df_interactions.reindex(columns=["DrugBank_ID", "Interacting_DrugBank_ID"]).dropna()
+    pairs = pairs[pairs["DrugBank_ID"] != pairs["Interacting_DrugBank_ID"]]
+    if pairs.empty:
+        return InteractionIndex(np.array([], dtype=str), np.zeros(1, dtype=np.int64), np.array([], dtype=np.int64))
+    codes, drug_ids = pd.factorize(pairs.to_numpy(dtype=object).ravel(), sort=True)
+    drug_ids = np.asarray(drug_ids, dtype=str)
+    codes = codes.reshape(-1, 2).astype(np.int64)
+
+    # Deduplicated edge keys in both directions, sorted by row and then column.
+    count = len(drug_ids)
+    keys = np.sort(np.concatenate([codes[:, 0] * count + codes[:, 1], codes[:, 1] * count + codes[:, 0]]))
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    rows, indices = np.divmod(keys, count)
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=indptr[1:])
+    return InteractionIndex(drug_ids, indptr, indices)
+
+# Slots standing for the two drug names in description templates. Control characters
+# cannot occur in XML 1.0 text, so they never clash with the description itself.
+DRUG_SLOT = "\x01"
+INTERACTING_DRUG_SLOT = "\x02"
+
+# Return the description template of one interaction, with both drug names replaced by slots.
+# The longer name is replaced first, so a name contained in the other one is not split up.
+def description_template(description, drug_name, interacting_name):
+    if not isinstance(description, str):
+        return None
+    names = [(drug_name, DRUG_SLOT), (interacting_name, INTERACTING_DRUG_SLOT)]
+    if isinstance(interacting_name, str) and (not isinstance(drug_name, str) or len(interacting_name) > len(drug_name)):
+        names.reverse()
+    for name, slot in names:
+        if isinstance(name, str) and name:
+            description = description.replace(name, slot)
+    return description
+
+# Fill the drug names back into a description template.
+def fill_template(template, drug_name, interacting_name):
+    if not isinstance(template, str):
+        return None
+    if isinstance(drug_name, str):
+        template = template.replace(DRUG_SLOT, drug_name)
+    if isinstance(interacting_name, str):
+        template = template.replace(INTERACTING_DRUG_SLOT, interacting_name)
+    return template
+
+# Return the interactions table in compact form: every column is categorical and the
+# Description column is replaced by its template, so each distinct sentence is stored once.
+# The compact table keeps its size when written with to_parquet.
+def compress_interactions(df_interactions):
+    # A file without interactions is parsed into a DataFrame without columns.
+    df_interactions = df_interactions.reindex(columns=INTERACTION_COLUMNS)
+    compact = pd.DataFrame({column: df_interactions[column].astype("category")
+                            for column in df_interactions.columns if column != "Description"})
+    compact["Description_template"] = pd.Categorical([
+        description_template(description, drug_name, interacting_name)
+        for description, drug_name, interacting_name in zip(df_interactions["Description"].tolist(),
+                                                             df_interactions["Drug_Official_Name"].tolist(),
+                                                             df_interactions["Interacting_Drug_Name"].tolist())
+    ])
+    return compact
+
+# Rebuild the descriptions of a compact table, only for the given row positions if any,
+# e.g. expand_descriptions(compact, range(20)) before displaying the first rows.
+def expand_descriptions(compact, rows=None):
+    if rows is not None:
+        compact = compact.iloc[list(rows)]
+    return pd.Series([fill_template(template, drug_name, interacting_name)
+                      for template, drug_name, interacting_name in zip(compact["Description_template"].tolist(),
+                                                                       compact["Drug_Official_Name"].tolist(),
+                                                                       compact["Interacting_Drug_Name"].tolist())],
+                     index=compact.index, name="Description", dtype=object)
+
+# Turn a compact table back into the DataFrame returned by parse_drug_interactions.
+def decompress_interactions(compact):
+    data = {column: compact[column].tolist() for column in compact.columns if column != "Description_template"}
+    data["Description"] = expand_descriptions(compact).tolist()
+    return pd.DataFrame(data)
+
 if __name__ == "__main__":
     file_path = '../drugbank_partial.xml'
     df_interactions = parse_drug_interactions(file_path)
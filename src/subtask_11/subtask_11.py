@@ -1,27 +1,32 @@
-import xml.etree.ElementTree as ET
+import os
+import sys
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xml_backend import parse_xml, find, findall
+
 # Return stripped text from a subelement.
 def get_text(elem, tag, ns={'db': 'http://www.drugbank.ca'}):
-    subelem = elem.find(tag, ns)
+    subelem = find(elem, tag, ns)
     return subelem.text.strip() if subelem is not None and subelem.text else None
 
 # Parse XML to extract drugs for a target gene.
 def parse_drugbank_for_gene(xml_file, target_gene):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(xml_file)
+    tree = parse_xml(xml_file)
     root = tree.getroot()
     
     drugs_info = {}
-    for drug in root.findall("db:drug", ns):
-        targets_elem = drug.find("db:targets", ns)
+    for drug in findall(root, "db:drug", ns):
+        targets_elem = find(drug, "db:targets", ns)
         if targets_elem is None:
             continue
         gene_found = False
-        for target in targets_elem.findall("db:target", ns):
-            polypep = target.find("db:polypeptide", ns)
+        for target in findall(targets_elem, "db:target", ns):
+            polypep = find(target, "db:polypeptide", ns)
             if polypep is None:
                 continue
             gene_name = get_text(polypep, "db:gene-name", ns)
@@ -30,16 +35,16 @@ def parse_drugbank_for_gene(xml_file, target_gene):
                 break
         if not gene_found:
             continue
-        primary_id_elem = drug.find("db:drugbank-id[@primary='true']", ns)
+        primary_id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
         if primary_id_elem is None or not primary_id_elem.text:
             continue
         drugbank_id = primary_id_elem.text.strip()
         drug_name = get_text(drug, "db:name", ns)
         
         products = []
-        products_elem = drug.find("db:products", ns)
+        products_elem = find(drug, "db:products", ns)
         if products_elem is not None:
-            for product in products_elem.findall("db:product", ns):
+            for product in findall(products_elem, "db:product", ns):
                 prod_name = get_text(product, "db:name", ns)
                 if prod_name:
                     products.append(prod_name)
@@ -51,6 +56,82 @@ def parse_drugbank_for_gene(xml_file, target_gene):
     
     return (target_gene, drugs_info)
 
+# Normalize a gene name for index lookups, matching the case-insensitive comparison above.
+def normalize_gene(gene):
+    return gene.strip().lower() if isinstance(gene, str) else None
+
+# Inverted index from normalized gene name to the drugs targeting it, with their products.
+class GeneIndex:
+    def __init__(self):
+        self.genes = {}
+
+    # Register a drug and the genes it targets; the drug info is shared by all its genes.
+    def add_drug(self, drugbank_id, drug_name, products, genes):
+        info = {"drug_name": drug_name, "products": products}
+        for gene in genes:
+            key = normalize_gene(gene)
+            if key:
+                self.genes.setdefault(key, {})[drugbank_id] = info
+
+    # Return (gene, drugs_info) like parse_drugbank_for_gene.
+    def lookup(self, gene):
+        return (gene, dict(self.genes.get(normalize_gene(gene), {})))
+
+    # Return the drugs of every gene in a panel, keyed by gene as given.
+    def lookup_panel(self, genes):
+        return dict(self.lookup(gene) for gene in genes)
+
+# Parse the XML once and index the drugs of every target gene.
+def build_gene_index(xml_file):
+    ns = {'db': 'http://www.drugbank.ca'}
+    root = parse_xml(xml_file).getroot()
+    index = GeneIndex()
+    for drug in findall(root, "db:drug", ns):
+        primary_id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
+        if primary_id_elem is None or not primary_id_elem.text:
+            continue
+        # Only the first polypeptide of a target counts, as in parse_drugbank_for_gene.
+        polypeps = [find(target, "db:polypeptide", ns) for target in findall(drug, "db:targets/db:target", ns)]
+        genes = {get_text(polypep, "db:gene-name", ns) for polypep in polypeps if polypep is not None}
+        genes.discard(None)
+        if not genes:
+            continue
+        products = [get_text(product, "db:name", ns) for product in findall(drug, "db:products/db:product", ns)]
+        index.add_drug(primary_id_elem.text.strip(), get_text(drug, "db:name", ns),
+                       [name for name in products if name], genes)
+    return index
+
+# Index the drugs of every target gene from tables extracted by common/drugbank_tables.py.
+def build_gene_index_from_tables(tables):
+    targets = tables["targets"]
+    genes_by_drug = targets.dropna(subset=["Gene_name"]).groupby("Drug_ID", sort=False)["Gene_name"].apply(set).to_dict()
+    products_by_drug = tables["products"].groupby("drug_id", sort=False)["product_name"].apply(list).to_dict()
+
+    index = GeneIndex()
+    for drug_id, drug_name in zip(tables["drugs"]["drug_id"], tables["drugs"]["name"]):
+        if not isinstance(drug_id, str) or not drug_id or drug_id not in genes_by_drug:
+            continue
+        product_names = [p.strip() for p in products_by_drug.get(drug_id, []) if isinstance(p, str) and p.strip()]
+        index.add_drug(drug_id.strip(), drug_name.strip() if isinstance(drug_name, str) and drug_name else None,
+                       product_names, genes_by_drug[drug_id])
+    return index
+
+# Find drugs for a target gene in tables extracted by common/drugbank_tables.py.
+def find_drugs_for_gene(tables, target_gene):
+    return build_gene_index_from_tables(tables).lookup(target_gene)
+
+# Build a DataFrame of drugs and products for a gene.
+def build_gene_dataframe(gene, drugs):
+    rows = []
+    for drugbank_id, info in drugs.items():
+        rows.append({
+            "Gene": gene,
+            "DrugBank_ID": drugbank_id,
+            "Drug_Name": info["drug_name"],
+            "Products": ", ".join(info["products"]) if info["products"] else ""
+        })
+    return pd.DataFrame(rows, columns=["Gene", "DrugBank_ID", "Drug_Name", "Products"])
+
 # Plot gene-drug-product network from DataFrame.
 def plot_gene_network(df, gene):
     G = nx.Graph()
@@ -85,20 +166,15 @@ if __name__ == "__main__":
     # Optional: Uncomment to use extended DrugBank XML file.
     # xml_file = '../drugbank_partial_and_generated.xml'
     
-    target_gene = input("Enter gene name: ")
-    gene, drugs = parse_drugbank_for_gene(xml_file, target_gene)
+    target_genes = [gene.strip() for gene in input("Enter gene name(s), separated by commas: ").split(",")]
+    # The index is built once and answers every gene of the panel.
+    gene_index = build_gene_index(xml_file)
+    panel = gene_index.lookup_panel(target_genes)
     
-    rows = []
-    for drugbank_id, info in drugs.items():
-        rows.append({
-            "Gene": gene,
-            "DrugBank_ID": drugbank_id,
-            "Drug_Name": info["drug_name"],
-            "Products": ", ".join(info["products"]) if info["products"] else ""
-        })
-    df = pd.DataFrame(rows, columns=["Gene", "DrugBank_ID", "Drug_Name", "Products"])
+    df = pd.concat([build_gene_dataframe(gene, drugs) for gene, drugs in panel.items()], ignore_index=True)
     
     print(df)
     df.to_csv("drugbank_gene_interactions.csv", index=False)
     
-    plot_gene_network(df, gene)
+    for gene in panel:
+        plot_gene_network(df[df["Gene"] == gene], gene)
@@ -1,59 +1,260 @@
+import os
+import sys
+import time
+import sqlite3
+import asyncio
 import xml.etree.ElementTree as ET
+import httpx
 import pandas as pd
 import requests
 
+# Add the src directory to the Python path for the shared common package.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.xml_backend import parse_xml, find, findall
+
 # Return stripped text from a subelement.
 def get_text(elem, tag, ns={'db': 'http://www.drugbank.ca'}):
-    subelem = elem.find(tag, ns)
+    subelem = find(elem, tag, ns)
     return subelem.text.strip() if subelem is not None and subelem.text else None
 
 # Return UniProt ID from a drug XML element.
 def get_uniprot_id(drug, ns={'db': 'http://www.drugbank.ca'}):
-    targets = drug.find("db:targets", ns)
+    targets = find(drug, "db:targets", ns)
     if targets is None:
         return ""
-    for target in targets.findall("db:target", ns):
-        polypep = target.find("db:polypeptide", ns)
+    for target in findall(targets, "db:target", ns):
+        polypep = find(target, "db:polypeptide", ns)
         if polypep is not None:
-            ext_ids = polypep.find("db:external-identifiers", ns)
+            ext_ids = find(polypep, "db:external-identifiers", ns)
             if ext_ids is not None:
-                for ext in ext_ids.findall("db:external-identifier", ns):
+                for ext in findall(ext_ids, "db:external-identifier", ns):
                     resource = get_text(ext, "db:resource", ns)
                     if resource == "UniProtKB":
                         return get_text(ext, "db:identifier", ns) or ""
     return ""
 
+# UniProt entry URL; {} is replaced by the accession.
+UNIPROT_URL = "https://www.uniprot.org/uniprot/{}.xml"
+
+# Details returned when an entry cannot be fetched.
+EMPTY_DETAILS = {"function": "", "subcellular_location": ""}
+
+# Parse the function and subcellular location from a UniProt XML entry.
+def parse_uniprot_entry(text):
+    ns_up = {"up": "http://uniprot.org/uniprot"}
+    root = ET.fromstring(text)
+    function = ""
+    for comment in root.findall("up:entry/up:comment[@type='function']", ns_up):
+        text_elem = comment.find("up:text", ns_up)
+        if text_elem is not None and text_elem.text:
+            function = text_elem.text.strip()
+            break
+    subcellular = ""
+    for comment in root.findall("up:entry/up:comment[@type='subcellular location']", ns_up):
+        text_elem = comment.find("up:text", ns_up)
+        if text_elem is not None and text_elem.text:
+            subcellular = text_elem.text.strip()
+            break
+    return {"function": function, "subcellular_location": subcellular}
+
+# Default location of the persistent UniProt cache.
+UNIPROT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".uniprot_cache.sqlite")
+
+# Persistent cache of parsed UniProt details in an SQLite file, keyed by accession.
+# Entries younger than `ttl` seconds are used without any request; older entries are
+# revalidated with their ETag and Last-Modified validators. Above `max_entries` entries
+# the least recently used ones are dropped.
+class UniProtCache:
+    def __init__(self, path=UNIPROT_CACHE_PATH, ttl=7 * 24 * 3600, max_entries=100000, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                accession TEXT PRIMARY KEY,
+                function TEXT,
+                subcellular_location TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                accessed_at REAL
+            )""")
+        self.connection.commit()
+
+    # Return the cached entry of an accession, or None. The entry holds the details,
+    # the validators and whether it is still fresh.
+    def get(self, accession):
+        row = self.connection.execute(
+            "SELECT function, subcellular_location, etag, last_modified, fetched_at FROM entries WHERE accession = ?",
+            (accession,)).fetchone()
+        if row is None:
+            return None
+        now = self.clock()
+        # Recency for eviction; committed at once so a read never holds the write lock.
+        self.connection.execute("UPDATE entries SET accessed_at = ? WHERE accession = ?", (now, accession))
+        self.connection.commit()
+        return {
+            "details": {"function": row[0], "subcellular_location": row[1]},
+            "etag": row[2],
+            "last_modified": row[3],
+            "fresh": now - row[4] < self.ttl
+        }
+
+    # Store freshly fetched details with their validators.
+    def put(self, accession, details, etag=None, last_modified=None):
+        now = self.clock()
+        self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (accession, details["function"], details["subcellular_location"],
+                                 etag, last_modified, now, now))
+        self.connection.execute(
+            "DELETE FROM entries WHERE accession IN "
+            "(SELECT accession FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        self.connection.commit()
+
+    # Mark an entry as fresh again after the server answered 304 Not Modified.
+    def touch(self, accession):
+        now = self.clock()
+        self.connection.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE accession = ?",
+                                (now, now, accession))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+# Return the conditional request headers for a cached entry.
+def revalidation_headers(cached):
+    headers = {}
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
 # Fetch UniProt details for a given ID.
-def fetch_uniprot_details(uniprot_id):
-    url = f"https://www.uniprot.org/uniprot/{uniprot_id}.xml"
-    headers = {"User-Agent": "Mozilla/5.0"}
+# With a UniProtCache, fresh entries are returned without a request and stale ones are revalidated.
+def fetch_uniprot_details(uniprot_id, cache=None):
+    cached = cache.get(uniprot_id) if cache is not None else None
+    if cached and cached["fresh"]:
+        return dict(cached["details"])
+    url = UNIPROT_URL.format(uniprot_id)
+    headers = {"User-Agent": "Mozilla/5.0", **revalidation_headers(cached)}
     try:
         response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code == 304 and cached:
+            cache.touch(uniprot_id)
+            return dict(cached["details"])
         if response.status_code == 200:
             xml_filename = f"uniprot_drug_data.xml"
             with open(xml_filename, "w", encoding="utf-8") as file:
                 file.write(response.text)
             print(f"Downloaded XML saved as: {xml_filename}")
-            ns_up = {"up": "http://uniprot.org/uniprot"}
-            root = ET.fromstring(response.text)
-            function = ""
-            for comment in root.findall("up:entry/up:comment[@type='function']", ns_up):
-                text_elem = comment.find("up:text", ns_up)
-                if text_elem is not None and text_elem.text:
-                    function = text_elem.text.strip()
-                    break
-            subcellular = ""
-            for comment in root.findall("up:entry/up:comment[@type='subcellular location']", ns_up):
-                text_elem = comment.find("up:text", ns_up)
-                if text_elem is not None and text_elem.text:
-                    subcellular = text_elem.text.strip()
-                    break
-            return {"function": function, "subcellular_location": subcellular}
+            details = parse_uniprot_entry(response.text)
+            if cache is not None:
+                cache.put(uniprot_id, details, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return details
         else:
-            return {"function": "", "subcellular_location": ""}
+            # Remember missing entries too, so warm runs do not ask for them again.
+            if response.status_code in (404, 410) and cache is not None:
+                cache.put(uniprot_id, EMPTY_DETAILS)
+            return dict(EMPTY_DETAILS)
     except Exception as e:
         print(f"Error fetching UniProt details for {uniprot_id}: {e}")
-        return {"function": "", "subcellular_location": ""}
+        return dict(cached["details"]) if cached else dict(EMPTY_DETAILS)
+
+# Spaces out the start of requests to at most `rate` per second (no limit for None).
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = 0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# Report a failed fetch and return the stale cached details, or empty details without an entry.
+def fallback_details(uniprot_id, cached, error):
+    print(f"Error fetching UniProt details for {uniprot_id}: {error}")
+    # A stale entry is still better than no details.
+    return dict(cached["details"]) if cached else dict(EMPTY_DETAILS)
+
+# Fetch one UniProt entry, retrying connection errors, 429 and 5xx responses with exponential backoff.
+# Other failures, such as a malformed entry, affect only this accession.
+# With a UniProtCache, fresh entries need no request and stale ones are revalidated.
+async def fetch_uniprot_async(client, uniprot_id, semaphore, limiter, url, retries, backoff, cache=None):
+    cached = cache.get(uniprot_id) if cache is not None else None
+    if cached and cached["fresh"]:
+        return dict(cached["details"])
+    headers = revalidation_headers(cached)
+
+    for attempt in range(retries + 1):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                response = await client.get(url.format(uniprot_id), headers=headers)
+            except httpx.TransportError as e:
+                response = None
+                error = str(e)
+            except httpx.HTTPError as e:
+                return fallback_details(uniprot_id, cached, e)
+        if response is not None:
+            if response.status_code == 304 and cached:
+                cache.touch(uniprot_id)
+                return dict(cached["details"])
+            if response.status_code == 200:
+                try:
+                    details = parse_uniprot_entry(response.text)
+                except ET.ParseError as e:
+                    return fallback_details(uniprot_id, cached, e)
+                if cache is not None:
+                    cache.put(uniprot_id, details, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return details
+            if response.status_code != 429 and response.status_code < 500:
+                # Remember missing entries too, so warm runs do not ask for them again.
+                if response.status_code in (404, 410) and cache is not None:
+                    cache.put(uniprot_id, EMPTY_DETAILS)
+                return dict(EMPTY_DETAILS)
+            error = f"HTTP {response.status_code}"
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** attempt)
+    return fallback_details(uniprot_id, cached, error)
+
+# Fetch the details of many UniProt entries concurrently and return them keyed by accession.
+# Accessions are deduplicated first. At most `concurrency` requests run at once over a pool of
+# as many keep-alive connections, and request starts are limited to `rate` per second.
+async def fetch_uniprot_bulk_async(uniprot_ids, concurrency=8, rate=10, retries=3, backoff=0.5,
+                                   url=UNIPROT_URL, timeout=10, cache=None):
+    unique_ids = list(dict.fromkeys(uid for uid in uniprot_ids if isinstance(uid, str) and uid))
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # The legacy UNIPROT_URL redirects to rest.uniprot.org.
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": "Mozilla/5.0"}) as client:
+        details = await asyncio.gather(*(fetch_uniprot_async(client, uid, semaphore, limiter, url, retries, backoff, cache)
+                                         for uid in unique_ids))
+    return dict(zip(unique_ids, details))
+
+# Blocking wrapper around fetch_uniprot_bulk_async.
+def fetch_uniprot_bulk(uniprot_ids, **kwargs):
+    return asyncio.run(fetch_uniprot_bulk_async(uniprot_ids, **kwargs))
+
+# Add UniProt function and subcellular location to every target with a UniProt ID
+# (the targets table of common/drugbank_tables.py), fetching each accession once.
+def enrich_targets(targets, **kwargs):
+    details = fetch_uniprot_bulk(targets["UniProt_ID"], **kwargs)
+    df = targets.copy()
+    for column in EMPTY_DETAILS:
+        df[column] = [details[uid][column] if uid in details else "" for uid in targets["UniProt_ID"]]
+    return df
 
 # Parse the DrugBank XML file and create a DataFrame containing:
 #  - drug_id, name, type, description, state,
@@ -61,42 +262,42 @@ def fetch_uniprot_details(uniprot_id):
 #  - uniprot_id
 def parse_drugbank_xml(file_path):
     ns = {'db': 'http://www.drugbank.ca'}
-    tree = ET.parse(file_path)
+    tree = parse_xml(file_path)
     root = tree.getroot()
     drugs = []
     
-    for drug in root.findall("db:drug", ns):
+    for drug in findall(root, "db:drug", ns):
         # Unique drug identifier
-        id_elem = drug.find("db:drugbank-id[@primary='true']", ns)
+        id_elem = find(drug, "db:drugbank-id[@primary='true']", ns)
         drug_id = id_elem.text.strip() if id_elem is not None and id_elem.text else None
 
         # Drug name
-        name_elem = drug.find("db:name", ns)
+        name_elem = find(drug, "db:name", ns)
         name = name_elem.text.strip() if name_elem is not None and name_elem.text else None
 
         # Drug type
         drug_type = drug.attrib.get("type", None)
 
         # Drug description (replace newlines with spaces)
-        description_elem = drug.find("db:description", ns)
+        description_elem = find(drug, "db:description", ns)
         description = (description_elem.text.strip().replace("\n", " ") 
                        if description_elem is not None and description_elem.text else None)
 
         # Drug state
-        state_elem = drug.find("db:state", ns)
+        state_elem = find(drug, "db:state", ns)
         state = state_elem.text.strip() if state_elem is not None and state_elem.text else None
 
         # Indications for use
-        indication_elem = drug.find("db:indication", ns)
+        indication_elem = find(drug, "db:indication", ns)
         indications = indication_elem.text.strip() if indication_elem is not None and indication_elem.text else None
 
         # Mechanism of action (replace newlines with spaces)
-        mechanism_elem = drug.find("db:mechanism-of-action", ns)
+        mechanism_elem = find(drug, "db:mechanism-of-action", ns)
         mechanism = (mechanism_elem.text.strip().replace("\n", " ") 
                      if mechanism_elem is not None and mechanism_elem.text else None)
 
         # Food interactions
-        food_elem = drug.find("db:food-interactions", ns)
+        food_elem = find(drug, "db:food-interactions", ns)
         food_interactions = food_elem.text.strip() if food_elem is not None and food_elem.text else None
 
         # UniProt ID – get it from targets/polypeptide/external-identifiers, if available
@@ -116,6 +317,20 @@ def parse_drugbank_xml(file_path):
     
     return pd.DataFrame(drugs)
 
+# Build the same DataFrame as parse_drugbank_xml from tables extracted by common/drugbank_tables.py.
+def drugs_from_tables(tables):
+    df = tables["drugs"].copy()
+    for column in ["drug_id", "name", "state", "indications", "food_interactions"]:
+        df[column] = df[column].map(lambda v: v.strip() if isinstance(v, str) and v else None)
+    for column in ["description", "mechanism"]:
+        df[column] = df[column].map(lambda v: v.strip().replace("\n", " ") if isinstance(v, str) and v else None)
+
+    # First UniProtKB identifier over the drug's targets.
+    targets = tables["targets"].dropna(subset=["UniProt_ID"])
+    first_uniprot = targets.groupby("Drug_ID", sort=False)["UniProt_ID"].first()
+    df["uniprot_id"] = tables["drugs"]["drug_id"].map(first_uniprot).fillna("")
+    return df
+
 if __name__ == '__main__':
     file_path = '../drugbank_partial.xml'
     # Optional: Uncomment to use extended DrugBank XML file.
@@ -129,14 +344,17 @@ if __name__ == '__main__':
         print(f"No drug found with drugbank id: {target_drugbank_id}")
     else:
         details_list = []
+        # Entries fetched by earlier runs are reused from the persistent cache.
+        cache = UniProtCache()
         for idx, row in df_filtered.iterrows():
             uniprot_id = row.get("uniprot_id", "")
             if uniprot_id:
                 print(f"Fetching UniProt data for {uniprot_id} ...")
-                uniprot_details = fetch_uniprot_details(uniprot_id)
+                uniprot_details = fetch_uniprot_details(uniprot_id, cache)
             else:
                 uniprot_details = {"function": "", "subcellular_location": ""}
             details_list.append(uniprot_details)
+        cache.close()
         
         df_details = pd.DataFrame(details_list)
         df_filtered = pd.concat([df_filtered.reset_index(drop=True), df_details], axis=1)
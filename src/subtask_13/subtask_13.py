@@ -1,7 +1,16 @@
 import os
+import io
 import random
 import copy
+import gzip
+import shutil
+import hashlib
+import argparse
+import tempfile
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import quoteattr
 from pathlib import Path
 
 # filepath: /home/students/inf/j/jk459158/ROK2/KursPython/Projekt/subtask_13/subtask_13.py
@@ -30,8 +39,16 @@ def build_pools(drugs):
             pools.setdefault(tag, []).append(copy.deepcopy(child))
     return pools
 
+# Liczba leków w jednym fragmencie przy generowaniu równoległym. Granice fragmentów nie zależą
+# od liczby procesów, dzięki czemu wynik jest identyczny bajt w bajt dla dowolnej liczby procesów.
+SHARD_SIZE = 10000
+
+# Stan procesu roboczego: zserializowana pula i atrybuty leków (ustawiane przez init_worker)
+WORKER_STATE = {}
+
 # Tworzy nowy element leku, kopiując losowo wybrane elementy z puli.
-def create_new_drug(new_id, pools, ns_uri, original_attribs):
+# rng pozwala użyć własnego generatora liczb losowych (domyślnie globalny moduł random).
+def create_new_drug(new_id, pools, ns_uri, original_attribs, rng=random):
     # Utworzenie elementu <drug> z przestrzenią nazw
     drug_elem = ET.Element(f"{{{ns_uri}}}drug")
     # Ustawienie losowo wybranych atrybutów (jeśli oryginalne leki posiadały atrybuty, kopiujemy je losowo)
@@ -43,16 +60,137 @@ def create_new_drug(new_id, pools, ns_uri, original_attribs):
     drugbank_id.set("primary", "true")
     # Dla każdej puli (pozostałe elementy) losujemy jeden egzemplarz oraz kopiujemy go (deepcopy)
     for tag, elements in pools.items():
-        source_elem = random.choice(elements)
+        source_elem = rng.choice(elements)
         new_elem = copy.deepcopy(source_elem)
         drug_elem.append(new_elem)
     return drug_elem
 
-def main():
-    # Ścieżki wejścia i wyjścia
-    input_file = "../drugbank_partial.xml"
-    output_file = "../drugbank_partial_and_generated.xml"
+# Serializuje element do tekstu XML bez deklaracji domyślnej przestrzeni nazw,
+# którą zapisujemy tylko raz, w korzeniu dokumentu.
+# Wymaga wcześniejszego ET.register_namespace('', ns_uri).
+def serialize_element(elem, ns_uri):
+    return ET.tostring(elem, encoding="unicode").replace(f' xmlns="{ns_uri}"', "", 1)
+
+# Serializuje jednorazowo każdy element z puli, aby nowe leki składać z gotowych
+# fragmentów tekstu zamiast kopiować (deepcopy) elementy dla każdego leku.
+def serialize_pools(pools, ns_uri):
+    return {tag: [serialize_element(elem, ns_uri) for elem in elements] for tag, elements in pools.items()}
+
+# Tworzy tekst XML nowego leku z losowo wybranych fragmentów puli.
+# Losowanie przebiega w tej samej kolejności co w create_new_drug.
+def generate_drug_xml(new_id, serialized_pools, original_attribs, rng=random):
+    attribs = "".join(f" {attr}={quoteattr(value)}" for attr, value in original_attribs.items())
+    parts = [f'<drug{attribs}><drugbank-id primary="true">DB{new_id:05d}</drugbank-id>']
+    for tag, fragments in serialized_pools.items():
+        parts.append(rng.choice(fragments))
+    parts.append("</drug>\n")
+    return "".join(parts)
+
+# Otwiera plik wyjściowy do zapisu tekstu, opcjonalnie skompresowany gzipem.
+def open_output(output_file, compress=False):
+    if compress or str(output_file).endswith(".gz"):
+        return gzip.open(output_file, "wt", encoding="utf-8")
+    return open(output_file, "w", encoding="utf-8")
+
+# Zwraca ścieżkę pliku tymczasowego output_file + ".tmp"; po udanym zapisie zastępuje on
+# output_file (os.replace), a po błędzie jest usuwany, więc przerwany zapis nie zostawia uciętej bazy.
+@contextmanager
+def atomic_output(output_file):
+    tmp_file = f"{output_file}.tmp"
+    try:
+        yield tmp_file
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+# Zwraca początek pliku wynikowego: deklarację XML, znacznik otwierający korzenia
+# (z deklaracjami przestrzeni nazw i atrybutami) oraz oryginalne leki.
+def database_header(root, drugs, ns_uri):
+    root_tag = ET.tostring(ET.Element(root.tag, root.attrib), encoding="unicode")[:-len(" />")] + ">"
+    parts = ["<?xml version='1.0' encoding='utf-8'?>\n", root_tag + (root.text or "\n")]
+    for drug in drugs:
+        parts.append(serialize_element(drug, ns_uri))
+    return "".join(parts)
+
+# Zwraca znacznik zamykający korzenia.
+def database_footer(root):
+    return f"</{strip_ns(root.tag)}>\n"
 
+# Zapisuje bazę strumieniowo: oryginalne leki, a po nich kolejno generowane nowe leki.
+# Każdy nowy lek jest zapisywany od razu i nie jest przechowywany w pamięci.
+def write_database(out, root, drugs, serialized_pools, ns_uri, original_attribs, first_id, new_drug_count):
+    out.write(database_header(root, drugs, ns_uri))
+    for new_id in range(first_id, first_id + new_drug_count):
+        out.write(generate_drug_xml(new_id, serialized_pools, original_attribs))
+    out.write(database_footer(root))
+
+# Wyprowadza ziarno fragmentu z ziarna głównego i numeru fragmentu.
+def shard_seed(seed, shard_index):
+    digest = hashlib.sha256(f"{seed}:{shard_index}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+# Zwraca tekst zakodowany w UTF-8, opcjonalnie jako osobny człon gzip.
+# Połączone człony gzip tworzą poprawny plik gzip; mtime=0 czyni wynik powtarzalnym.
+def encode_part(text, compress):
+    data = text.encode("utf-8")
+    return gzip.compress(data, mtime=0) if compress else data
+
+# Otwiera plik częściowy fragmentu do zapisu tekstu, opcjonalnie jako człon gzip.
+@contextmanager
+def open_part(part_path, compress):
+    with open(part_path, "wb") as raw:
+        if compress:
+            with gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz:
+                with io.TextIOWrapper(gz, encoding="utf-8", newline="\n") as out:
+                    yield out
+        else:
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="\n") as out:
+                yield out
+
+# Inicjalizacja procesu roboczego – pula jest przesyłana raz na proces, a nie raz na fragment.
+def init_worker(serialized_pools, original_attribs):
+    WORKER_STATE["pools"] = serialized_pools
+    WORKER_STATE["attribs"] = original_attribs
+
+# Generuje jeden fragment – leki o kolejnych ID od first_id – do pliku częściowego.
+def generate_shard(shard_index, first_id, count, seed, part_path, compress):
+    rng = random.Random(shard_seed(seed, shard_index))
+    with open_part(part_path, compress) as out:
+        for new_id in range(first_id, first_id + count):
+            out.write(generate_drug_xml(new_id, WORKER_STATE["pools"], WORKER_STATE["attribs"], rng))
+    return part_path
+
+# Generuje nowe leki równolegle we fragmentach po shard_size leków i skleja je w jeden plik.
+# Fragment i zawsze dostaje ziarno shard_seed(seed, i), więc wynik nie zależy od liczby procesów.
+# Wynik zastępuje output_file dopiero w całości (patrz atomic_output).
+def write_database_sharded(output_file, header, footer, serialized_pools, original_attribs,
+                           first_id, new_drug_count, seed, workers, compress, shard_size=SHARD_SIZE):
+    shards = [(shard_index, first_id + start, min(shard_size, new_drug_count - start))
+              for shard_index, start in enumerate(range(0, new_drug_count, shard_size))]
+    parts_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_file)), prefix=".parts-")
+    try:
+        with atomic_output(output_file) as tmp_file, open(tmp_file, "wb") as out, ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker,
+                initargs=(serialized_pools, original_attribs)) as executor:
+            out.write(encode_part(header, compress))
+            futures = [executor.submit(generate_shard, shard_index, shard_first_id, count, seed,
+                                       os.path.join(parts_dir, f"{shard_index}.part"), compress)
+                       for shard_index, shard_first_id, count in shards]
+            # Sklejanie fragmentów w kolejności ID
+            for future in futures:
+                part_path = future.result()
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, out)
+                os.remove(part_path)
+            out.write(encode_part(footer, compress))
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+# Podanie seed lub workers włącza generowanie równoległe i powtarzalne (patrz write_database_sharded).
+def main(total_drugs=20000, input_file="../drugbank_partial.xml",
+         output_file="../drugbank_partial_and_generated.xml", compress=False, seed=None, workers=None):
     # Parsowanie oryginalnego pliku XML
     tree = ET.parse(input_file)
     root = tree.getroot()
@@ -83,9 +221,8 @@ def main():
             except ValueError:
                 continue
 
-    # Nowa łączna liczba leków ma wynosić 20000
-    total_drugs = 200
-    new_drug_count = total_drugs - original_drug_count
+    # Łączna liczba leków jest parametrem (docelowo 20000)
+    new_drug_count = max(0, total_drugs - original_drug_count)
     print(f"Generowanie {new_drug_count} nowych leków...")
 
     # Utworzenie puli atrybutów - zbieramy wszystkie atrybuty z oryginalnych leków (z pierwszego leku)
@@ -93,22 +230,28 @@ def main():
     if drugs:
         original_attribs = drugs[0].attrib
 
-    # Generowanie nowych leków z kolejnymi numerami DrugBank ID
-    new_drugs = []
-    next_id = max_id + 1
-    for i in range(new_drug_count):
-        new_drug = create_new_drug(next_id, pools, ns_uri, original_attribs)
-        new_drugs.append(new_drug)
-        next_id += 1
-
-    # Dodanie nowych leków do drzewa XML – zachowujemy oryginalne leki
-    for nd in new_drugs:
-        root.append(nd)
-
-    # Zapisz wynik do pliku wyjściowego
+    # Generowanie nowych leków z kolejnymi numerami DrugBank ID i zapis strumieniowy
+    # – zachowujemy oryginalne leki
     ET.register_namespace('', ns_uri)
-    tree.write(output_file, encoding="utf-8", xml_declaration=True)
-    print(f"Zapisano rozszerzony plik XML (20000 leków) do: {output_file}")
+    serialized_pools = serialize_pools(pools, ns_uri)
+    if seed is None and workers is None:
+        compress = compress or str(output_file).endswith(".gz")
+        with atomic_output(output_file) as tmp_file, open_output(tmp_file, compress) as out:
+            write_database(out, root, drugs, serialized_pools, ns_uri, original_attribs, max_id + 1, new_drug_count)
+    else:
+        write_database_sharded(output_file, database_header(root, drugs, ns_uri), database_footer(root),
+                               serialized_pools, original_attribs, max_id + 1, new_drug_count,
+                               seed or 0, workers or 1, compress or str(output_file).endswith(".gz"),
+                               shard_size=SHARD_SIZE)
+    print(f"Zapisano rozszerzony plik XML ({original_drug_count + new_drug_count} leków) do: {output_file}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generator testowej bazy DrugBank.")
+    parser.add_argument("--total-drugs", type=int, default=20000, help="łączna liczba leków w bazie wynikowej")
+    parser.add_argument("--input", default="../drugbank_partial.xml")
+    parser.add_argument("--output", default="../drugbank_partial_and_generated.xml")
+    parser.add_argument("--gzip", action="store_true", help="kompresuj plik wynikowy gzipem")
+    parser.add_argument("--seed", type=int, help="ziarno główne generowania powtarzalnego")
+    parser.add_argument("--workers", type=int, help="liczba procesów generujących fragmenty")
+    args = parser.parse_args()
+    main(args.total_drugs, args.input, args.output, args.gzip, args.seed, args.workers)
\ No newline at end of file
@@ -1,23 +1,203 @@
+import asyncio
+from contextlib import asynccontextmanager, closing, suppress
+import importlib.util
+import json
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import threading
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from subtask_06.subtask_06 import parse_all_pathways, build_drug_pathway_counts
-import os
 
-app = FastAPI()
+# Add the src and subtask_06 directories to the Python path.
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SRC_DIR)
+sys.path.append(os.path.join(SRC_DIR, "subtask_06"))
+from subtask_06 import parse_all_pathways, build_drug_pathway_counts
+from common.drugbank_tables import pathway_records
+from common.table_cache import load_tables, default_cache_dir, file_fingerprint
+
+# XML file path; set DRUGBANK_XML to serve another DrugBank release.
+XML_FILE_PATH = os.environ.get("DRUGBANK_XML", os.path.join(SRC_DIR, "drugbank_partial.xml"))
+
+# Seconds between checks of the XML file for changes; 0 disables the watcher.
+RELOAD_INTERVAL = float(os.environ.get("DRUGBANK_RELOAD_INTERVAL", "5"))
+
+# The Parquet table cache needs pyarrow; without it the XML is parsed at startup.
+USE_TABLE_CACHE = importlib.util.find_spec("pyarrow") is not None
+
+# Bytes of the index file SQLite may memory-map; mapped pages are shared by all workers.
+INDEX_MMAP_SIZE = 256 * 1024 * 1024
+
+# Pathway counts per drug, looked up by drug name or DrugBank ID.
+class DrugCountIndex:
+    def __init__(self, by_name, by_id):
+        self.by_name = by_name
+        self.by_id = by_id
+
+    # Return the pathway count of a drug name or DrugBank ID, or None if unknown.
+    def lookup(self, drug):
+        count = self.by_name.get(drug)
+        if count is None:
+            count = self.by_id.get(drug)
+        return count
+
+# Build the drug to pathway count index, from the table cache when available.
+def build_drug_count_index(file_path, use_cache=True):
+    if use_cache:
+        pathways = pathway_records(load_tables(file_path))
+    else:
+        pathways = parse_all_pathways(file_path)
+    return DrugCountIndex(build_drug_pathway_counts(pathways),
+                          build_drug_pathway_counts(pathways, key="drug_ids"))
+
+# Pathway counts per drug, read from a memory-mapped read-only SQLite index file.
+# Several uvicorn workers (uvicorn subtask_15.subtask_15:app --workers 4) can open the
+# same file, and the operating system keeps a single copy of its pages for all of them.
+class MappedDrugCountIndex:
+    def __init__(self, path):
+        uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro&immutable=1"
+        self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.connection.execute(f"PRAGMA mmap_size = {INDEX_MMAP_SIZE}")
+
+    # Return the pathway count of a drug name or DrugBank ID, or None if unknown.
+    def lookup(self, drug):
+        for table in ("by_name", "by_id"):
+            row = self.connection.execute(f"SELECT pathway_count FROM {table} WHERE drug = ?", (drug,)).fetchone()
+            if row is not None:
+                return row[0]
+        return None
+
+    def close(self):
+        self.connection.close()
+
+    # An index swapped out by a reload is closed when the last request holding it drops it.
+    def __del__(self):
+        connection = getattr(self, "connection", None)
+        if connection is not None:
+            connection.close()
+
+# Return the index file path for an XML file, keyed by the file fingerprint.
+def index_file_path(file_path):
+    source = os.path.basename(file_path)
+    return os.path.join(default_cache_dir(file_path), f"{source}-drug_count-{file_fingerprint(file_path)}.sqlite")
+
+# Write the index into an SQLite file. The file is renamed into place, so it is never seen half-written.
+def write_index_file(index, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    with closing(sqlite3.connect(tmp_path)) as connection:
+        for table, counts in (("by_name", index.by_name), ("by_id", index.by_id)):
+            connection.execute(f"CREATE TABLE {table} (drug TEXT PRIMARY KEY, pathway_count INTEGER) WITHOUT ROWID")
+            connection.executemany(f"INSERT INTO {table} VALUES (?, ?)", counts.items())
+        connection.commit()
+    os.replace(tmp_path, path)
+
+# Open the index file for an XML file, building it first if no worker has done so yet.
+def load_drug_count_index(file_path, use_cache=True):
+    path = index_file_path(file_path)
+    if not os.path.exists(path):
+        write_index_file(build_drug_count_index(file_path, use_cache), path)
+
+        # Remove index files of older versions of the XML file.
+        index_dir = os.path.dirname(path)
+        prefix = f"{os.path.basename(file_path)}-drug_count-"
+        for name in os.listdir(index_dir):
+            if name.startswith(prefix) and os.path.join(index_dir, name) != path:
+                # Another worker may have removed it already.
+                with suppress(FileNotFoundError):
+                    os.remove(os.path.join(index_dir, name))
+    return MappedDrugCountIndex(path)
+
+# Holds the current index and swaps in a rebuilt one when the XML file changes.
+class IndexReloader:
+    def __init__(self, file_path, use_cache=True):
+        self.file_path = file_path
+        self.use_cache = use_cache
+        self.lock = threading.Lock()
+        self.fingerprint = file_fingerprint(file_path)
+        self.index = load_drug_count_index(file_path, use_cache)
+
+    # Rebuild the index if the XML file changed and return True if a new index was swapped in.
+    # Triggers that arrive during a rebuild wait for it and then find the file unchanged,
+    # so concurrent triggers result in a single rebuild.
+    def reload_if_changed(self):
+        with self.lock:
+            fingerprint = file_fingerprint(self.file_path)
+            if fingerprint == self.fingerprint:
+                return False
+            index = load_drug_count_index(self.file_path, self.use_cache)
+            # A single assignment swaps the index; requests keep the index they started with,
+            # and MappedDrugCountIndex.__del__ closes the old one once the last of them drops it.
+            self.index = index
+            self.fingerprint = fingerprint
+            return True
+
+# Check the XML file for changes in the background and reload the index.
+async def watch_xml_file(reloader, interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(reloader.reload_if_changed)
+        except Exception as e:
+            # Keep serving the current index, e.g. while a new file is still being copied.
+            print(f"Error reloading the drug index from {reloader.file_path}: {e}")
+
+# Load the index once when the application starts, without blocking the event loop,
+# and keep it up to date with the XML file.
+@asynccontextmanager
+async def lifespan(app):
+    app.state.reloader = await run_in_threadpool(IndexReloader, XML_FILE_PATH, USE_TABLE_CACHE)
+    watcher = None
+    if RELOAD_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_xml_file(app.state.reloader, RELOAD_INTERVAL))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    app.state.reloader.index.close()
+
+app = FastAPI(lifespan=lifespan)
 
 class DrugRequest(BaseModel):
     drug: str
 
+class DrugBatchRequest(BaseModel):
+    drugs: list[str]
+
 @app.post("/drug_count")
 async def get_drug_count(request: DrugRequest):
-    # XML file path
-    file_path = os.path.join(os.path.dirname(__file__), "..", "drugbank_partial.xml")
-    try:
-        pathways = parse_all_pathways(file_path)
-        drug_counts = build_drug_pathway_counts(pathways)
-        count = drug_counts.get(request.drug)
-        if count is None:
-            raise HTTPException(status_code=404, detail="Drug not found")
-        return {"drug": request.drug, "pathway_count": count}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    count = app.state.reloader.index.lookup(request.drug)
+    if count is None:
+        raise HTTPException(status_code=404, detail="Drug not found")
+    return {"drug": request.drug, "pathway_count": count}
+
+# Stream pathway counts for many drug names or DrugBank IDs as NDJSON, one line per drug.
+# Unknown drugs are reported inline instead of failing the whole request.
+# The generator is synchronous, so Starlette runs the lookups in its thread pool.
+@app.post("/drug_count/batch")
+async def get_drug_counts(request: DrugBatchRequest):
+    # Use one index snapshot for the whole batch, even if a reload happens meanwhile.
+    index = app.state.reloader.index
+
+    def results():
+        for drug in request.drugs:
+            count = index.lookup(drug)
+            if count is None:
+                result = {"drug": drug, "error": "Drug not found"}
+            else:
+                result = {"drug": drug, "pathway_count": count}
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# Reload the index now if the XML file changed.
+@app.post("/reload")
+async def reload_index():
+    reloaded = await run_in_threadpool(app.state.reloader.reload_if_changed)
+    return {"reloaded": reloaded}
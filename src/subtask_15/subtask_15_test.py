@@ -1,3 +1,4 @@
+import json
 import requests
 
 def main():
@@ -7,5 +8,14 @@ def main():
     print("Status code:", response.status_code)
     print("Response JSON:", response.json())
 
+    # Batch request: results are streamed back as one JSON object per line.
+    batch_url = "http://127.0.0.1:8000/drug_count/batch"
+    batch_payload = {"drugs": ["Lepirudin", "DB00001", "Unknown drug"]}
+    with requests.post(batch_url, json=batch_payload, stream=True) as response:
+        print("Status code:", response.status_code)
+        for line in response.iter_lines():
+            if line:
+                print("Result:", json.loads(line))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory and the chart subtask directories to the Python path
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, SRC_DIR)
+for subtask in ["subtask_06", "subtask_08", "subtask_09"]:
+    sys.path.insert(0, os.path.join(SRC_DIR, subtask))
+from common.aggregates import LocationCounts, StatusCounts, PathwayCounts, aggregate, aggregate_parallel
+import subtask_06
+import subtask_08
+import subtask_09
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # Three drugs with groups, targets in two locations and two pathways.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug>
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <groups><group>approved</group><group>withdrawn</group></groups>
+            <pathways>
+              <pathway>
+                <name>Pathway 1</name>
+                <drugs>
+                  <drug><drugbank-id>DB0001</drugbank-id><name>DrugA</name></drug>
+                  <drug><drugbank-id>DB0002</drugbank-id><name>DrugB</name></drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <targets>
+              <target><polypeptide id="P1"><cellular-location>Membrane</cellular-location></polypeptide></target>
+              <target><polypeptide id="P2"><cellular-location>Cytoplasm</cellular-location></polypeptide></target>
+            </targets>
+          </drug>
+          <drug>
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+            <groups><group>Approved</group><group>investigational</group></groups>
+            <pathways>
+              <pathway>
+                <name>Pathway 2</name>
+                <drugs>
+                  <drug><drugbank-id>DB0002</drugbank-id><name>DrugB</name></drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <targets>
+              <target>
+                <polypeptide id="P1"><cellular-location>Membrane</cellular-location></polypeptide>
+                <polypeptide id="P4"><cellular-location>Nucleus</cellular-location></polypeptide>
+              </target>
+            </targets>
+          </drug>
+          <drug>
+            <drugbank-id primary="true">DB0003</drugbank-id>
+            <name>DrugC</name>
+            <groups><group>vet_approved</group></groups>
+            <targets>
+              <target><polypeptide id="P3"/></target>
+            </targets>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_aggregates_match_subtasks(sample_xml):
+    locations, statuses, pathways = aggregate(str(sample_xml), [LocationCounts(), StatusCounts(), PathwayCounts()])
+
+    # Complex targets count with their first polypeptide only.
+    assert locations.result() == {"Membrane": 2, "Cytoplasm": 1}
+    assert locations.result() == subtask_08.parse_targets_info(str(sample_xml))["Cellular_location"].value_counts().to_dict()
+    assert subtask_08.location_chart_data(locations.result(), top_n=1) == \
+        subtask_08.prepare_location_chart_data(subtask_08.parse_targets_info(str(sample_xml)), top_n=1)
+
+    df_status, approved_not_withdrawn = subtask_09.status_table(statuses.result())
+    expected_status, expected_approved = subtask_09.count_drug_statuses(subtask_09.parse_drug_status(str(sample_xml)))
+    pd.testing.assert_frame_equal(df_status, expected_status)
+    assert approved_not_withdrawn == expected_approved == 1
+
+    assert pathways.result() == subtask_06.build_drug_pathway_counts(subtask_06.parse_all_pathways(str(sample_xml)))
+    assert subtask_06.count_drug_pathways(str(sample_xml), key="drug_ids") == {"DB0001": 1, "DB0002": 2}
+
+def test_aggregate_parallel_merges_shards(sample_xml):
+    expected = [counter.result() for counter in aggregate(str(sample_xml), [LocationCounts(), StatusCounts(), PathwayCounts()])]
+    merged = aggregate_parallel(str(sample_xml), [LocationCounts(), StatusCounts(), PathwayCounts()], workers=2)
+    assert [counter.result() for counter in merged] == expected
@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import textwrap
+import pytest
+
+# Add the benchmarks directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from benchmark_parsers import PARSERS, run_benchmarks, write_report, generate_fixture
+
+@pytest.fixture
+def source_xml(tmp_path):
+    # Two drugs with targets, products, pathways, groups and interactions for the generator pools.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug type="biotech">
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <groups>
+              <group>approved</group>
+            </groups>
+            <products>
+              <product>
+                <name>ProductA</name>
+                <labeller>Labeller A</labeller>
+              </product>
+            </products>
+            <pathways>
+              <pathway>
+                <smpdb-id>SMP0001</smpdb-id>
+                <name>Pathway 1</name>
+                <category>metabolic</category>
+                <drugs>
+                  <drug>
+                    <drugbank-id>DB0001</drugbank-id>
+                    <name>DrugA</name>
+                  </drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <drug-interactions>
+              <drug-interaction>
+                <drugbank-id>DB0002</drugbank-id>
+                <name>DrugB</name>
+                <description>DrugA may increase the effect of DrugB.</description>
+              </drug-interaction>
+            </drug-interactions>
+            <targets>
+              <target>
+                <id>BE0001</id>
+                <polypeptide id="P00001" source="Swiss-Prot">
+                  <name>Receptor 1</name>
+                  <gene-name>GENE1</gene-name>
+                  <cellular-location>Membrane</cellular-location>
+                </polypeptide>
+              </target>
+            </targets>
+          </drug>
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+            <groups>
+              <group>experimental</group>
+            </groups>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "source.xml"
+    xml_file.write_text(xml_content)
+    return str(xml_file)
+
+def test_generate_fixture_is_reused(source_xml, tmp_path):
+    fixture_dir = str(tmp_path / "fixtures")
+    path = generate_fixture(source_xml, 10, fixture_dir)
+    mtime = os.stat(path).st_mtime_ns
+    # A second call finds the fixture and does not generate it again.
+    assert generate_fixture(source_xml, 10, fixture_dir) == path
+    assert os.stat(path).st_mtime_ns == mtime
+
+def test_run_benchmarks_reports_every_parser(source_xml, tmp_path):
+    report = run_benchmarks(source_xml, scales=[20], fixture_dir=str(tmp_path / "fixtures"),
+                            gene="GENE1", isolate=False)
+    results = report["results"]
+    assert [result["parser"] for result in results] == list(PARSERS)
+    for result in results:
+        assert result["drugs"] == 20
+        assert result["scale"] == 20
+        assert result["wall_time_s"] > 0
+        assert result["drugs_per_s"] == pytest.approx(20 / result["wall_time_s"])
+        assert result["peak_rss_bytes"] > 0
+    rows = {result["parser"]: result["rows"] for result in results}
+    assert rows["parse_drugbank_xml"] == 20
+    assert rows["parse_drug_interactions"] > 0
+
+    # The report is written as JSON.
+    output = tmp_path / "results.json"
+    write_report(report, str(output))
+    assert json.loads(output.read_text())["results"] == results
+
+def test_benchmark_runs_parser_in_separate_process(source_xml, tmp_path):
+    report = run_benchmarks(source_xml, scales=[5], parsers=["parse_drugbank_xml"],
+                            fixture_dir=str(tmp_path / "fixtures"), repeat=2)
+    result, = report["results"]
+    assert result["rows"] == 5
+    assert len(result["runs"]) == 2
+    assert result["wall_time_s"] == min(result["runs"])
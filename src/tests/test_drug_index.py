@@ -0,0 +1,76 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.drugbank_tables import extract_tables
+from common.drug_index import DrugIdIndex, DrugLookup, ID_COLUMNS
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # DrugA has two products and interacts with DrugB; both drugs share one pathway.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <products>
+              <product><name>ProductA1</name></product>
+              <product><name>ProductA2</name></product>
+            </products>
+            <pathways>
+              <pathway>
+                <smpdb-id>SMP0001</smpdb-id>
+                <drugs>
+                  <drug><drugbank-id>DB0001</drugbank-id><name>DrugA</name></drug>
+                  <drug><drugbank-id>DB0002</drugbank-id><name>DrugB</name></drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <drug-interactions>
+              <drug-interaction drugbank-id="DB0002" name="DrugB">
+                <description>DrugA interacts with DrugB</description>
+              </drug-interaction>
+            </drug-interactions>
+          </drug>
+          <drug type="biotech">
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+            <products>
+              <product><name>ProductB</name></product>
+            </products>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_drug_id_index_ranges():
+    index = DrugIdIndex(["DB2", "DB1", "DB2", None, "DB1", "DB2"])
+    assert list(index.positions("DB1")) == [1, 4]
+    assert list(index.positions("DB2")) == [0, 2, 5]
+    assert list(index.positions("DB9")) == []
+    assert "DB1" in index and "DB9" not in index
+
+def test_drug_lookup_matches_scans(sample_xml):
+    tables = extract_tables(str(sample_xml))
+    lookup = DrugLookup(tables)
+
+    # Every table returns the same rows as a boolean scan of its ID column.
+    for table, column in ID_COLUMNS.items():
+        df = tables[table]
+        for drug_id in ["DB0001", "DB0002", "DB9999"]:
+            if table == "pathways":
+                expected = df[df[column].map(lambda ids: drug_id in ids)]
+            else:
+                expected = df[df[column] == drug_id]
+            pd.testing.assert_frame_equal(lookup.rows(table, drug_id), expected)
+
+    assert list(lookup.rows("products", "DB0001")["product_name"]) == ["ProductA1", "ProductA2"]
+    assert len(lookup.drug("DB0002")["pathways"]) == 1
+    assert "DB0002" in lookup and "DB9999" not in lookup
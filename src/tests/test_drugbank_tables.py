@@ -0,0 +1,175 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory and the compared subtask directories to the Python path
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, SRC_DIR)
+for subtask in ["subtask_01", "subtask_02", "subtask_03", "subtask_06", "subtask_07", "subtask_09", "subtask_10", "subtask_11"]:
+    sys.path.insert(0, os.path.join(SRC_DIR, subtask))
+from common.drugbank_tables import extract_tables, pathway_records, TARGET_COLUMNS
+from common.drugbank_xml import NS, iter_drugs
+import subtask_01
+import subtask_02
+import subtask_03
+import subtask_06
+import subtask_07
+import subtask_09
+import subtask_10
+import subtask_11
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # Two drugs covering every table: synonyms, products, pathways, targets, groups and interactions.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug type="biotech">
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <drugbank-id>BTD0001</drugbank-id>
+            <name>DrugA</name>
+            <description>Description A</description>
+            <state>liquid</state>
+            <indication>Indication A</indication>
+            <mechanism-of-action>Mechanism A</mechanism-of-action>
+            <food-interactions>None</food-interactions>
+            <groups>
+              <group>approved</group>
+              <group>withdrawn</group>
+            </groups>
+            <synonyms>
+              <synonym>Alpha</synonym>
+              <synonym>A-drug</synonym>
+            </synonyms>
+            <products>
+              <product>
+                <name>ProductA</name>
+                <labeller>Labeller A</labeller>
+                <ndc-product-code>0001-01</ndc-product-code>
+                <dosage-form>Tablet</dosage-form>
+                <route>Oral</route>
+                <strength>10 mg</strength>
+                <fda-application-number>NDA0001</fda-application-number>
+              </product>
+              <product>
+                <name>ProductA EU</name>
+                <ema-product-code>EMEA/1</ema-product-code>
+              </product>
+            </products>
+            <pathways>
+              <pathway>
+                <smpdb-id>SMP0001</smpdb-id>
+                <name>Pathway 1</name>
+                <category>metabolic</category>
+                <drugs>
+                  <drug>
+                    <drugbank-id>DB0001</drugbank-id>
+                    <name>DrugA</name>
+                  </drug>
+                  <drug>
+                    <drugbank-id>DB0002</drugbank-id>
+                    <name>DrugB</name>
+                  </drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <drug-interactions>
+              <drug-interaction>
+                <drugbank-id>DB0002</drugbank-id>
+                <name>DrugB</name>
+                <description>DrugA may increase the effect of DrugB.</description>
+              </drug-interaction>
+            </drug-interactions>
+            <targets>
+              <target>
+                <id>BE0001</id>
+                <polypeptide id="P00001" source="Swiss-Prot">
+                  <name>Receptor 1</name>
+                  <gene-name>GENE1</gene-name>
+                  <cellular-location>Membrane</cellular-location>
+                  <chromosome-location>1</chromosome-location>
+                  <external-identifiers>
+                    <external-identifier>
+                      <resource>GenAtlas</resource>
+                      <identifier>GENE1</identifier>
+                    </external-identifier>
+                    <external-identifier>
+                      <resource>UniProtKB</resource>
+                      <identifier>P00001</identifier>
+                    </external-identifier>
+                  </external-identifiers>
+                </polypeptide>
+              </target>
+              <target>
+                <id>BE0002</id>
+              </target>
+            </targets>
+          </drug>
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+            <groups>
+              <group>experimental</group>
+            </groups>
+            <targets>
+              <target>
+                <id>BE0001</id>
+                <polypeptide id="P00001" source="Swiss-Prot">
+                  <name>Receptor 1</name>
+                  <gene-name>GENE1</gene-name>
+                  <cellular-location>Membrane</cellular-location>
+                </polypeptide>
+              </target>
+            </targets>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_tables_match_subtask_parsers(sample_xml):
+    tables = extract_tables(str(sample_xml))
+
+    pd.testing.assert_frame_equal(tables["drugs"], subtask_01.parse_drugbank_xml(str(sample_xml)))
+    pd.testing.assert_frame_equal(tables["synonyms"], subtask_02.parse_drugbank_xml(str(sample_xml)))
+    pd.testing.assert_frame_equal(tables["products"], subtask_03.parse_pharma_products(str(sample_xml)))
+    assert pathway_records(tables) == subtask_06.parse_all_pathways(str(sample_xml))
+    pd.testing.assert_frame_equal(tables["targets"][TARGET_COLUMNS], subtask_07.parse_targets_info(str(sample_xml)))
+    pd.testing.assert_frame_equal(tables["interactions"], subtask_10.parse_drug_interactions(str(sample_xml)))
+
+def test_tables_link_targets_and_groups_to_drugs(sample_xml):
+    tables = extract_tables(str(sample_xml))
+
+    # Only targets with a polypeptide are kept, each linked to its drug.
+    assert list(tables["targets"]["Drug_ID"]) == ["DB0001", "DB0002"]
+    assert tables["targets"]["UniProt_ID"].iloc[0] == "P00001"
+    assert pd.isna(tables["targets"]["UniProt_ID"].iloc[1])
+
+    # Status flags derived from the groups table.
+    status = subtask_09.build_drug_status(tables["groups"]["groups"])
+    assert list(status["approved"]) == [True, False]
+    assert list(status["withdrawn"]) == [True, False]
+    assert list(status["experimental"]) == [False, True]
+
+def test_find_drugs_for_gene_matches_parser(sample_xml):
+    tables = extract_tables(str(sample_xml))
+
+    expected = subtask_11.parse_drugbank_for_gene(str(sample_xml), "gene1")
+    assert subtask_11.find_drugs_for_gene(tables, "gene1") == expected
+
+def test_stream_tables_match_full_parse(sample_xml):
+    tables = extract_tables(str(sample_xml))
+    tables_stream = extract_tables(str(sample_xml), stream=True)
+
+    for table in tables:
+        pd.testing.assert_frame_equal(tables_stream[table], tables[table])
+    pd.testing.assert_frame_equal(subtask_07.parse_targets_info(str(sample_xml), stream=True),
+                                  subtask_07.parse_targets_info(str(sample_xml)))
+
+def test_iter_drugs_skips_pathway_drugs(sample_xml):
+    # Nested <drug> elements inside pathways are not top-level drugs.
+    ids = [drug.find("db:drugbank-id", NS).text for drug in iter_drugs(str(sample_xml))]
+    assert ids == ["DB0001", "DB0002"]
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import textwrap
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common import instrumentation
+from common.instrumentation import Profiler, span, count, profiling
+from common.drugbank_tables import extract_tables
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug type="biotech">
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <synonyms>
+              <synonym>Alpha</synonym>
+            </synonyms>
+          </drug>
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return str(xml_file)
+
+def test_disabled_instrumentation_is_a_no_op():
+    assert instrumentation.ACTIVE_PROFILER is None
+    with span("stage"):
+        count("rows", 3)
+    assert instrumentation.ACTIVE_PROFILER is None
+
+def test_nested_spans_and_counters():
+    with profiling() as profiler:
+        with span("outer"):
+            count("rows", 2)
+            with span("inner"):
+                data = [bytes(1000) for _ in range(1000)]
+                count("rows", 3)
+                del data
+    assert instrumentation.ACTIVE_PROFILER is None
+
+    spans = {record["name"]: record for record in profiler.to_dict()["spans"]}
+    assert spans["inner"]["parent"] == "outer"
+    assert spans["inner"]["depth"] == 1
+    assert spans["outer"]["counters"] == {"rows": 2}
+    assert spans["inner"]["counters"] == {"rows": 3}
+    assert profiler.counters == {"rows": 5}
+    # The inner span allocated about 1 MB; the outer span includes that peak.
+    assert spans["inner"]["peak_alloc_bytes"] >= 1000 * 1000
+    assert spans["outer"]["peak_alloc_bytes"] >= spans["inner"]["peak_alloc_bytes"]
+    assert spans["outer"]["duration_s"] >= spans["inner"]["duration_s"]
+
+def test_profiling_without_memory_tracing():
+    with profiling(trace_memory=False) as profiler:
+        with span("stage"):
+            pass
+    record, = profiler.to_dict()["spans"]
+    assert record["peak_alloc_bytes"] is None
+
+def test_chrome_trace(tmp_path):
+    profiler = Profiler(trace_memory=False)
+    with profiler.span("stage"):
+        profiler.count("drug_elements", 2)
+    path = tmp_path / "trace.json"
+    profiler.write(str(path), chrome=True)
+
+    trace = json.loads(path.read_text())
+    event, = trace["traceEvents"]
+    assert event["name"] == "stage"
+    assert event["ph"] == "X"
+    assert event["dur"] >= 0
+    assert event["args"] == {"drug_elements": 2}
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_extract_tables_stages(sample_xml, stream):
+    with profiling() as profiler:
+        tables = extract_tables(sample_xml, stream=stream)
+
+    names = [record["name"] for record in profiler.to_dict()["spans"]]
+    if stream:
+        assert names == ["xml_parse_and_extraction", "dataframe_build"]
+    else:
+        assert names == ["xml_parse", "extraction", "dataframe_build"]
+    assert profiler.counters["drug_elements"] == 2
+    assert profiler.counters["rows.drugs"] == len(tables["drugs"]) == 2
+    assert profiler.counters["rows.synonyms"] == 2
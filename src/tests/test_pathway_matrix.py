@@ -0,0 +1,44 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.pathway_matrix import build_pathway_matrix
+
+@pytest.fixture
+def pathways():
+    # P1 lists DrugA twice; P3 appears twice under the same name; P4 has no drugs.
+    return [
+        {"pathway_name": "P1", "drug_ids": ["DB1", "DB2", "DB1"], "drug_names": ["DrugA", "DrugB", "DrugA"]},
+        {"pathway_name": "P2", "drug_ids": ["DB1", "DB3"], "drug_names": ["DrugA", "DrugC"]},
+        {"pathway_name": "P3", "drug_ids": ["DB3"], "drug_names": ["DrugC"]},
+        {"pathway_name": "P3", "drug_ids": ["DB2"], "drug_names": ["DrugB", None]},
+        {"pathway_name": "P4", "drug_ids": [], "drug_names": []},
+    ]
+
+def test_build_pathway_matrix(pathways):
+    matrix = build_pathway_matrix(pathways)
+    assert list(matrix.pathways) == ["P1", "P2", "P3", "P4"]
+    assert list(matrix.drugs) == ["DrugA", "DrugB", "DrugC"]
+    assert matrix.matrix.nnz == 6
+
+    assert matrix.drug_pathway_counts() == {"DrugA": 2, "DrugB": 2, "DrugC": 2}
+    assert list(matrix.pathway_degrees()) == [2, 2, 2, 0]
+    assert matrix.pathway_drugs("P3") == ["DrugB", "DrugC"]
+    assert matrix.pathway_drugs("P9") == []
+    assert matrix.drug_pathways("DrugA") == ["P1", "P2"]
+    assert list(matrix.count_histogram()) == [0, 0, 3]
+
+def test_cooccurrence(pathways):
+    matrix = build_pathway_matrix(pathways, key="drug_ids")
+    drugs = matrix.drug_cooccurrence().toarray()
+    # DB1 and DB2 share P1, DB1 and DB3 share P2, DB2 and DB3 share P3.
+    assert np.array_equal(drugs, [[2, 1, 1], [1, 2, 1], [1, 1, 2]])
+    assert matrix.pathway_cooccurrence().toarray()[0].tolist() == [2, 1, 1, 0]
+
+def test_empty_pathways():
+    matrix = build_pathway_matrix([])
+    assert matrix.drug_pathway_counts() == {}
+    assert matrix.matrix.shape == (0, 0)
@@ -0,0 +1,104 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.drugbank_tables import extract_tables
+from common.sharded_parse import find_drug_ranges, split_shards, extract_tables_parallel
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # Ten drugs using a prefixed namespace, each with a pathway listing a nested <db:drug>.
+    drug_template = textwrap.dedent("""\
+          <db:drug type="small molecule">
+            <db:drugbank-id primary="true">DB{n:05d}</db:drugbank-id>
+            <db:name>Drug{n}</db:name>
+            <db:pathways>
+              <db:pathway>
+                <db:smpdb-id>SMP{n:05d}</db:smpdb-id>
+                <db:name>Pathway {n}</db:name>
+                <db:drugs>
+                  <db:drug>
+                    <db:drugbank-id>DB{n:05d}</db:drugbank-id>
+                    <db:name>Drug{n}</db:name>
+                  </db:drug>
+                </db:drugs>
+              </db:pathway>
+            </db:pathways>
+            <db:drug-interactions>
+              <db:drug-interaction drugbank-id="DB00001" name="Drug1">
+                <db:description>Drug{n} interacts with Drug1.</db:description>
+              </db:drug-interaction>
+            </db:drug-interactions>
+          </db:drug>
+    """)
+    drugs = "".join(drug_template.format(n=n) for n in range(1, 11))
+    xml_content = ('<?xml version="1.0"?>\n<db:drugbank xmlns:db="http://www.drugbank.ca" version="5.1">\n'
+                   + drugs + "</db:drugbank>\n")
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_find_drug_ranges(sample_xml):
+    header, footer, ranges = find_drug_ranges(str(sample_xml))
+
+    # Nested pathway drugs are not counted as top-level drugs.
+    assert len(ranges) == 10
+    assert header.endswith(b'version="5.1">')
+    assert footer == b"</db:drugbank>"
+    data = sample_xml.read_bytes()
+    assert all(data[start:end].startswith(b"<db:drug ") and data[start:end].endswith(b"</db:drug>")
+               for start, end in ranges)
+
+def test_split_shards():
+    ranges = [(0, 10), (10, 20), (20, 30), (30, 40), (40, 50)]
+    assert split_shards(ranges, 2) == [(0, 30), (30, 50)]
+    assert split_shards(ranges, 10) == ranges
+
+def test_extract_tables_parallel_matches_sequential(sample_xml):
+    tables = extract_tables(str(sample_xml))
+    tables_parallel = extract_tables_parallel(str(sample_xml), workers=2)
+
+    for table in tables:
+        pd.testing.assert_frame_equal(tables_parallel[table], tables[table])
+    assert list(tables_parallel["drugs"]["drug_id"]) == [f"DB{n:05d}" for n in range(1, 11)]
+
+def test_find_drug_ranges_skips_comments_and_cdata(tmp_path):
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <!-- <drugbank> export -->
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug>
+            <drugbank-id primary="true">DB00001</drugbank-id>
+            <!-- <drug> -->
+            <description><![CDATA[Not a closing tag: </drug>]]></description>
+          </drug>
+          <drug/>
+          <drug type="small molecule" />
+          <drug>
+            <drugbank-id primary="true">DB00002</drugbank-id>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+
+    header, footer, ranges = find_drug_ranges(str(xml_file))
+    assert header.endswith(b'<drugbank xmlns="http://www.drugbank.ca">')
+    data = xml_file.read_bytes()
+    assert [data[start:end].split(b"\n")[0] for start, end in ranges] == \
+        [b"<drug>", b"<drug/>", b'<drug type="small molecule" />', b"<drug>"]
+
+    tables = extract_tables(str(xml_file))
+    tables_parallel = extract_tables_parallel(str(xml_file), workers=2)
+    for table in tables:
+        pd.testing.assert_frame_equal(tables_parallel[table], tables[table])
+
+def test_find_drug_ranges_empty_file(tmp_path):
+    xml_file = tmp_path / "empty.xml"
+    xml_file.write_bytes(b"")
+    with pytest.raises(ValueError, match="empty"):
+        find_drug_ranges(str(xml_file))
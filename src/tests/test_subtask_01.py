@@ -64,4 +64,9 @@ def test_parse_drugbank_xml(sample_xml):
     assert row2['state'] == "approved"
     assert row2['indications'] == "Diabetes"
     assert row2['mechanism'] == "Enables cellular uptake of glucose"
-    assert row2['food_interactions'] == "Monitor carbohydrate intake"
\ No newline at end of file
+    assert row2['food_interactions'] == "Monitor carbohydrate intake"
+
+def test_parse_drugbank_xml_stream(sample_xml):
+    # Streaming mode should produce the same DataFrame as the full-tree parse.
+    df_stream = parse_drugbank_xml(str(sample_xml), stream=True)
+    pd.testing.assert_frame_equal(df_stream, parse_drugbank_xml(str(sample_xml)))
@@ -7,7 +7,7 @@ import matplotlib.pyplot as plt
 
 # Add the subtask_02 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_02"))
-from subtask_02 import parse_drugbank_xml, display_synonym_graph
+from subtask_02 import parse_drugbank_xml, display_synonym_graph, normalize_name, build_synonym_index
 
 @pytest.fixture
 def sample_xml(tmp_path):
@@ -63,4 +63,25 @@ def test_display_synonym_graph_invalid(sample_xml, capsys):
     display_synonym_graph(invalid_id, df)
     captured = capsys.readouterr().out.strip()
     expected = f"No drug found with DrugBank ID: {invalid_id}"
-    assert expected in captured
\ No newline at end of file
+    assert expected in captured
+
+def test_normalize_name():
+    assert normalize_name("  Acetylsalicylic-ACID ") == "acetylsalicylic acid"
+    assert normalize_name(None) == ""
+
+def test_build_synonym_index(sample_xml):
+    index = build_synonym_index(parse_drugbank_xml(str(sample_xml)))
+
+    # Exact matches of names and synonyms, whatever the case and punctuation.
+    assert index.resolve("aspirin") == [("DB0001", 1.0)]
+    assert index.resolve("acetylsalicylic  acid.") == [("DB0001", 1.0)]
+    assert index.resolve("HUMULIN") == [("DB0002", 1.0)]
+
+    # Typos are matched by shared character n-grams.
+    drug_id, score = index.resolve("Acetylsalicilic Acid")[0]
+    assert drug_id == "DB0001" and 0.5 <= score < 1.0
+    assert index.resolve("Paracetamol") == []
+
+    # A batch resolves every raw name to its best DrugBank ID.
+    assert index.resolve_batch(["Insulin", "Humulinn", "ASA", "unknown", "Insulin"]) == \
+        ["DB0002", "DB0002", "DB0001", None, "DB0002"]
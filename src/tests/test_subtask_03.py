@@ -71,4 +71,9 @@ def test_parse_pharma_products(sample_xml):
     assert prod2['route'] == "Oral"
     assert prod2['strength'] == "250 mg"
     assert prod2['country'] == "EU"         # Because ema-product-code is present
-    assert prod2['regulatory_agency'] == "EMA"
\ No newline at end of file
+    assert prod2['regulatory_agency'] == "EMA"
+
+def test_parse_pharma_products_stream(sample_xml):
+    # Streaming mode should produce the same DataFrame as the full-tree parse.
+    df_stream = parse_pharma_products(str(sample_xml), stream=True)
+    pd.testing.assert_frame_equal(df_stream, parse_pharma_products(str(sample_xml)))
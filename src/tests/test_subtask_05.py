@@ -7,7 +7,8 @@ import matplotlib.pyplot as plt
 
 # Add the subtask_05 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_05"))
-from subtask_05 import parse_all_pathways, display_graph
+import subtask_05
+from subtask_05 import parse_all_pathways, display_graph, pathway_drug_edges
 
 @pytest.fixture
 def sample_xml(tmp_path):
@@ -88,4 +89,34 @@ def test_display_graph(sample_xml, monkeypatch):
     try:
         display_graph(df)
     except Exception as e:
-        pytest.fail(f"display_graph() raised an exception: {e}")
\ No newline at end of file
+        pytest.fail(f"display_graph() raised an exception: {e}")
+
+def test_pathway_drug_edges():
+    df = pd.DataFrame({
+        "pathway_name": ["P1", "P2", "P3"],
+        "drug_names": [["Drug1", "Drug2", "Drug1"], [], ["Drug3", None]],
+    })
+    edges = pathway_drug_edges(df)
+    assert list(edges.itertuples(index=False, name=None)) == [("P1", "Drug1"), ("P1", "Drug2"), ("P3", "Drug3")]
+
+def test_display_large_graph(monkeypatch):
+    monkeypatch.setattr(plt, "show", lambda: None)
+    # 300 pathways of 10 drugs each are above the large graph threshold.
+    df = pd.DataFrame({
+        "pathway_name": [f"P{p}" for p in range(300)],
+        "drug_names": [[f"Drug{(p * 7 + d) % 500}" for d in range(10)] for p in range(300)],
+    })
+    # The matrix built for the size check is reused for drawing.
+    built = []
+    pathway_matrix = subtask_05.pathway_matrix
+    monkeypatch.setattr(subtask_05, "pathway_matrix", lambda df: built.append(df) or pathway_matrix(df))
+    display_graph(df)
+    assert len(built) == 1
+
+    # All edges are one line collection, nodes are binned and only the top nodes are labelled.
+    ax = plt.gcf().axes[0]
+    lines = [c for c in ax.collections if c.__class__.__name__ == "LineCollection"]
+    assert len(lines) == 1
+    assert all(len(c.get_offsets()) <= 100 for c in ax.collections if c not in lines)
+    assert len(ax.texts) == 30
+    plt.close("all")
@@ -86,4 +86,11 @@ def test_display_histogram(monkeypatch):
     try:
         display_histogram(sample_counts)
     except Exception as e:
-        pytest.fail(f"display_histogram() raised an exception: {e}")
\ No newline at end of file
+        pytest.fail(f"display_histogram() raised an exception: {e}")
+
+def test_build_drug_pathway_counts_by_id(sample_xml):
+    pathways = parse_all_pathways(str(sample_xml))
+
+    # The same counts keyed by DrugBank ID.
+    drug_counts = build_drug_pathway_counts(pathways, key="drug_ids")
+    assert drug_counts == {"DB01": 2, "DB02": 1, "DB03": 1}
@@ -6,7 +6,7 @@ import pandas as pd
 
 # Add the subtask_07 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_07"))
-from subtask_07 import parse_targets_info
+from subtask_07 import parse_targets_info, parse_target_store, denormalize_targets
 
 @pytest.fixture
 def sample_xml(tmp_path):
@@ -63,4 +63,89 @@ def test_parse_targets_info(sample_xml):
     assert row["Gene_name"] == "GENE1"
     assert row["GenAtlas_ID"] == "GA001"
     assert row["Chromosome"] == "1p36"
-    assert row["Cellular_location"] == "Cytoplasm"
\ No newline at end of file
+    assert row["Cellular_location"] == "Cytoplasm"
+@pytest.fixture
+def shared_target_xml(tmp_path):
+    # Both drugs target polypeptide P001; the second drug also targets P002.
+    polypeptide = textwrap.indent(textwrap.dedent("""\
+        <polypeptide id="P001" source="SwissProt">
+          <name>PolyA</name>
+          <gene-name>GENE1</gene-name>
+          <chromosome-location>1p36</chromosome-location>
+          <cellular-location>Cytoplasm</cellular-location>
+          <external-identifiers>
+            <external-identifier>
+              <resource>UniProtKB</resource>
+              <identifier>P001</identifier>
+            </external-identifier>
+            <external-identifier>
+              <resource>GenAtlas</resource>
+              <identifier>GA001</identifier>
+            </external-identifier>
+          </external-identifiers>
+        </polypeptide>"""), " " * 8)
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug>
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <targets>
+              <target>
+                <id>BE0001</id>
+        {polypeptide}
+              </target>
+            </targets>
+          </drug>
+          <drug>
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <targets>
+              <target>
+                <id>BE0001</id>
+        {polypeptide}
+              </target>
+              <target>
+                <id>BE0002</id>
+                <polypeptide id="P002" source="TrEMBL">
+                  <name>PolyB</name>
+                </polypeptide>
+              </target>
+              <target>
+                <id>BE0003</id>
+                <polypeptide source="TrEMBL">
+                  <name>PolyC</name>
+                </polypeptide>
+              </target>
+              <target>
+                <id>BE0004</id>
+                <polypeptide>
+                  <name>PolyD</name>
+                  <cellular-location>Nucleus</cellular-location>
+                </polypeptide>
+              </target>
+            </targets>
+          </drug>
+        </drugbank>
+    """).format(polypeptide=polypeptide)
+    xml_file = tmp_path / "shared_targets.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_parse_target_store(shared_target_xml):
+    store = parse_target_store(str(shared_target_xml))
+
+    # The shared polypeptide and its identifiers are stored once.
+    # Polypeptides without an ID get a row per target instead of sharing one.
+    assert list(store["polypeptides"]["External_ID"].fillna("")) == ["P001", "P002", "", ""]
+    assert list(store["polypeptides"]["Polypeptide_name"]) == ["PolyA", "PolyB", "PolyC", "PolyD"]
+    assert list(store["drug_targets"].fillna("").itertuples(index=False, name=None)) == [
+        ("DB0001", "BE0001", "P001", 0), ("DB0002", "BE0001", "P001", 0), ("DB0002", "BE0002", "P002", 1),
+        ("DB0002", "BE0003", "", 2), ("DB0002", "BE0004", "", 3)]
+    assert list(store["external_identifiers"]["Resource"]) == ["UniProtKB", "GenAtlas"]
+
+    # Joining the store back gives the denormalized targets table.
+    pd.testing.assert_frame_equal(denormalize_targets(store), parse_targets_info(str(shared_target_xml)))
+
+    # Streaming gives the same store.
+    stream_store = parse_target_store(str(shared_target_xml), stream=True)
+    for table in store:
+        pd.testing.assert_frame_equal(stream_store[table], store[table])
@@ -7,7 +7,8 @@ import matplotlib.pyplot as plt
 
 # Add the subtask_09 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_09"))
-from subtask_09 import parse_drug_status, create_donut_chart
+from subtask_09 import parse_drug_status, create_donut_chart, pack_group_flags, parse_group_flags, query_groups, count_groups, \
+    count_drug_statuses_streaming, status_table_from_flags
 
 @pytest.fixture
 def sample_xml(tmp_path):
@@ -96,4 +97,30 @@ def test_create_donut_chart(monkeypatch):
     try:
         create_donut_chart(labels, counts, title)
     except Exception as e:
-        pytest.fail(f"create_donut_chart() raised an exception: {e}")
\ No newline at end of file
+        pytest.fail(f"create_donut_chart() raised an exception: {e}")
+
+def test_parse_group_flags(sample_xml):
+    flags = parse_group_flags(str(sample_xml))
+    assert flags.dtype == "uint8"
+    # approved | experimental, withdrawn | vet_approved, approved, no groups.
+    assert list(flags) == [1 | 4, 2 | 16, 1, 0]
+
+def test_status_table_from_flags(sample_xml):
+    df_status, approved_not_withdrawn = status_table_from_flags(parse_group_flags(str(sample_xml)))
+    expected, expected_approved_not_withdrawn = count_drug_statuses_streaming(str(sample_xml))
+    pd.testing.assert_frame_equal(df_status, expected)
+    assert approved_not_withdrawn == expected_approved_not_withdrawn == 2
+
+def test_query_groups():
+    flags = pack_group_flags([["approved", "investigational"], ["approved", "withdrawn"],
+                              ["illicit"], ["nutraceutical", "approved"], [], ["unknown"]])
+    assert list(query_groups(flags, "approved & ~withdrawn")) == [True, False, False, True, False, False]
+    assert list(query_groups(flags, "illicit or (nutraceutical and not withdrawn)")) == \
+        [False, False, True, True, False, False]
+    assert count_groups(flags, "approved", "approved ^ investigational", "~(approved | illicit)") == \
+        {"approved": 3, "approved ^ investigational": 2, "~(approved | illicit)": 2}
+
+    with pytest.raises(ValueError):
+        query_groups(flags, "approved & unknown")
+    with pytest.raises(ValueError):
+        query_groups(flags, "approved + withdrawn")
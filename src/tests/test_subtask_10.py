@@ -6,7 +6,7 @@ import pandas as pd
 
 # Add the subtask_10 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_10"))
-from subtask_10 import parse_drug_interactions
+from subtask_10 import parse_drug_interactions, build_interaction_index, compress_interactions, expand_descriptions, decompress_interactions
 
 @pytest.fixture
 def sample_xml(tmp_path):
@@ -47,4 +47,81 @@ def test_parse_drug_interactions(sample_xml):
     assert row["Drug_Official_Name"] == "DrugA"
     assert row["Interacting_DrugBank_ID"] == "DB0002"
     assert row["Interacting_Drug_Name"] == "DrugB"
-    assert row["Description"] == "Interaction description between DrugA and DrugB"
\ No newline at end of file
+    assert row["Description"] == "Interaction description between DrugA and DrugB"
+
+def test_parse_drug_interactions_stream(sample_xml):
+    # Streaming mode should produce the same DataFrame as the full-tree parse.
+    df_stream = parse_drug_interactions(str(sample_xml), stream=True)
+    pd.testing.assert_frame_equal(df_stream, parse_drug_interactions(str(sample_xml)))
+
+def test_build_interaction_index():
+    df = pd.DataFrame({
+        "DrugBank_ID": ["DB0001", "DB0001", "DB0002", "DB0004"],
+        "Drug_Official_Name": ["DrugA", "DrugA", "DrugB", "DrugD"],
+        "Interacting_DrugBank_ID": ["DB0002", "DB0003", "DB0001", "DB0003"],
+        "Interacting_Drug_Name": ["DrugB", "DrugC", "DrugA", "DrugC"],
+        "Description": ["", "", "", ""],
+    })
+    index = build_interaction_index(df)
+
+    # Interactions are symmetric and deduplicated.
+    assert list(index.drug_ids) == ["DB0001", "DB0002", "DB0003", "DB0004"]
+    assert index.neighbors("DB0003") == ["DB0001", "DB0004"]
+    assert index.neighbors("DB0002") == ["DB0001"]
+    assert index.neighbors("DB9999") == []
+    assert index.interacts("DB0002", "DB0001")
+    assert not index.interacts("DB0002", "DB0003")
+    assert not index.interacts("DB0001", "DB9999")
+
+    # All interacting pairs of a regimen, unknown drugs are ignored.
+    regimen = ["DB0003", "DB9999", "DB0001", "DB0002", "DB0004"]
+    assert index.regimen_interactions(regimen) == [("DB0003", "DB0001"), ("DB0003", "DB0004"), ("DB0001", "DB0002")]
+    assert index.regimen_interactions(["DB0002", "DB0004"]) == []
+
+def test_build_interaction_index_from_xml(sample_xml):
+    index = build_interaction_index(parse_drug_interactions(str(sample_xml)))
+    assert index.regimen_interactions(["DB0002", "DB0001"]) == [("DB0002", "DB0001")]
+
+    # An empty interaction table gives an empty index.
+    empty = build_interaction_index(pd.DataFrame())
+    assert empty.neighbors("DB0001") == []
+    assert empty.regimen_interactions(["DB0001", "DB0002"]) == []
+
+def test_compress_interactions():
+    df = pd.DataFrame({
+        "DrugBank_ID": ["DB0001", "DB0002", "DB0003", "DB0001"],
+        "Drug_Official_Name": ["Insulin", "Aspirin", "Heparin", "Insulin"],
+        "Interacting_DrugBank_ID": ["DB0004", "DB0003", "DB0002", "DB0002"],
+        "Interacting_Drug_Name": ["Insulin glargine", "Heparin", "Aspirin", "Aspirin"],
+        "Description": [
+            "Insulin glargine may increase the hypoglycemic activities of Insulin.",
+            "The risk or severity of bleeding can be increased when Aspirin is combined with Heparin.",
+            "The risk or severity of bleeding can be increased when Heparin is combined with Aspirin.",
+            None,
+        ],
+    })
+    compact = compress_interactions(df)
+
+    # The two bleeding descriptions share one template.
+    assert compact["Description_template"].cat.categories.size == 2
+    assert all(isinstance(compact[column].dtype, pd.CategoricalDtype) for column in compact.columns)
+
+    # Descriptions are rebuilt exactly, for selected rows or the whole table.
+    assert expand_descriptions(compact, [1]).tolist() == [df.loc[1, "Description"]]
+    pd.testing.assert_frame_equal(decompress_interactions(compact), df)
+
+def test_compress_interactions_empty():
+    # parse_drug_interactions returns a DataFrame without columns for a file without interactions.
+    compact = compress_interactions(pd.DataFrame())
+    assert len(compact) == 0
+    assert list(compact.columns) == ["DrugBank_ID", "Drug_Official_Name", "Interacting_DrugBank_ID",
+                                     "Interacting_Drug_Name", "Description_template"]
+    assert list(decompress_interactions(compact).columns) == ["DrugBank_ID", "Drug_Official_Name",
+                                                              "Interacting_DrugBank_ID", "Interacting_Drug_Name",
+                                                              "Description"]
+
+def test_compress_interactions_parquet(sample_xml, tmp_path):
+    pytest.importorskip("pyarrow")
+    df = parse_drug_interactions(str(sample_xml))
+    compress_interactions(df).to_parquet(tmp_path / "interactions.parquet")
+    pd.testing.assert_frame_equal(decompress_interactions(pd.read_parquet(tmp_path / "interactions.parquet")), df)
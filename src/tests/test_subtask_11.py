@@ -7,13 +7,14 @@ import matplotlib.pyplot as plt
 
 # Add the subtask_11 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_11"))
-from subtask_11 import parse_drugbank_for_gene, plot_gene_network
+from subtask_11 import parse_drugbank_for_gene, plot_gene_network, build_gene_index
 
 @pytest.fixture
 def sample_xml(tmp_path):
     # Sample XML with two drugs:
     # - The first drug targets gene "BRCA1" and has two products:
     #   one product with a different name and one identical to the drug name (should be ignored).
+    #   Its target is a complex whose second polypeptide, gene "GENEB", is not read.
     # - The second drug targets gene "BRCA2" (won't be returned when searching for BRCA1).
     xml_content = textwrap.dedent("""\
         <?xml version="1.0"?>
@@ -26,6 +27,9 @@ def sample_xml(tmp_path):
                 <polypeptide>
                   <gene-name>BRCA1</gene-name>
                 </polypeptide>
+                <polypeptide>
+                  <gene-name>GENEB</gene-name>
+                </polypeptide>
               </target>
             </targets>
             <products>
@@ -96,4 +100,20 @@ def test_plot_gene_network(monkeypatch):
     try:
         plot_gene_network(df, gene)
     except Exception as e:
-        pytest.fail(f"plot_gene_network() raised an exception: {e}")
\ No newline at end of file
+        pytest.fail(f"plot_gene_network() raised an exception: {e}")
+
+def test_build_gene_index(sample_xml):
+    index = build_gene_index(str(sample_xml))
+
+    # Single lookups match the full parse, whatever the case of the gene name.
+    for gene in ["BRCA1", "brca2", "TP53", "GENEB"]:
+        assert index.lookup(gene) == parse_drugbank_for_gene(str(sample_xml), gene)
+    # Only the first polypeptide of a target is indexed.
+    assert index.lookup("GENEB") == ("GENEB", {})
+
+    # A panel is answered from the same index, keyed by the genes as given.
+    panel = index.lookup_panel(["brca1", " BRCA2 ", "TP53"])
+    assert list(panel) == ["brca1", " BRCA2 ", "TP53"]
+    assert list(panel["brca1"]) == ["DB001"]
+    assert panel[" BRCA2 "]["DB002"] == {"drug_name": "DrugTwo", "products": ["ProductB"]}
+    assert panel["TP53"] == {}
@@ -1,13 +1,16 @@
 import os
 import sys
+import time
 import textwrap
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
 import pandas as pd
 import xml.etree.ElementTree as ET
 
 # Add the subtask_12 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_12"))
-from subtask_12 import parse_drugbank_xml, fetch_uniprot_details
+from subtask_12 import parse_drugbank_xml, fetch_uniprot_details, fetch_uniprot_bulk, enrich_targets, UniProtCache
 
 @pytest.fixture
 def sample_drugbank_xml(tmp_path):
@@ -94,4 +97,203 @@ def test_fetch_uniprot_details(monkeypatch):
     # Clean up the file that might have been created.
     xml_filename = "uniprot_drug_data.xml"
     if os.path.exists(xml_filename):
-        os.remove(xml_filename)
\ No newline at end of file
+        os.remove(xml_filename)
+
+UNIPROT_ENTRY = textwrap.dedent("""\
+    <?xml version="1.0"?>
+    <uniprot xmlns="http://uniprot.org/uniprot">
+      <entry>
+        <comment type="function"><text>Function of {accession}</text></comment>
+        <comment type="subcellular location"><text>Membrane</text></comment>
+      </entry>
+    </uniprot>
+""")
+
+# Local stand-in for the UniProt REST service.
+# /P00404.xml is missing, the first request for /P00503.xml fails with 503,
+# /P00666.xml is not valid XML and /R<n>.xml redirects to /P<n>.xml like the legacy UniProt URLs.
+# Entries carry an ETag and a matching If-None-Match is answered with 304 Not Modified.
+class UniProtHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        accession = self.path.strip("/").removesuffix(".xml")
+        with server.lock:
+            server.requests.append(accession)
+            server.ports.add(self.client_address[1])
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(0.02)
+        with server.lock:
+            server.active -= 1
+            failed_before = server.requests.count(accession) > 1
+
+        etag = f'"{accession}-v1"'
+        if accession.startswith("R"):
+            self.send_response(301)
+            self.send_header("Location", f"/P{accession[1:]}.xml")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if accession == "P00666":
+            status, body = 200, b"<uniprot><entry>"
+        elif accession == "P00404":
+            status, body = 404, b""
+        elif accession == "P00503" and not failed_before:
+            status, body = 503, b""
+        elif self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+            with server.lock:
+                server.not_modified.append(accession)
+        else:
+            status, body = 200, UNIPROT_ENTRY.format(accession=accession).encode()
+        self.send_response(status)
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def uniprot_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UniProtHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.not_modified = []
+    server.ports = set()
+    server.active = 0
+    server.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_uniprot_bulk(uniprot_server):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    ids = [f"P{i:05d}" for i in range(1, 13)] * 2 + ["P00404", "P00503", None, ""]
+    details = fetch_uniprot_bulk(ids, concurrency=3, rate=None, backoff=0.01, url=url)
+
+    # Every accession is fetched once, the 503 is retried once and the 404 is not retried.
+    assert sorted(uniprot_server.requests) == sorted([f"P{i:05d}" for i in range(1, 13)] + ["P00404", "P00503", "P00503"])
+    assert details["P00001"] == {"function": "Function of P00001", "subcellular_location": "Membrane"}
+    assert details["P00503"]["function"] == "Function of P00503"
+    assert details["P00404"] == {"function": "", "subcellular_location": ""}
+    assert len(details) == 14
+
+    # At most three requests run at once, over at most three kept-alive connections.
+    assert uniprot_server.max_active <= 3
+    assert len(uniprot_server.ports) <= 3
+
+def test_fetch_uniprot_bulk_follows_redirects(uniprot_server):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    details = fetch_uniprot_bulk(["R00007"], rate=None, url=url)
+    assert details["R00007"] == {"function": "Function of P00007", "subcellular_location": "Membrane"}
+    assert uniprot_server.requests == ["R00007", "P00007"]
+
+def test_fetch_uniprot_bulk_malformed_entry(uniprot_server, tmp_path):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    # A malformed entry gives empty details without failing the other accessions.
+    details = fetch_uniprot_bulk(["P00666", "P00001"], rate=None, url=url)
+    assert details["P00666"] == {"function": "", "subcellular_location": ""}
+    assert details["P00001"]["function"] == "Function of P00001"
+
+    # A stale cache entry is returned instead.
+    clock = FakeClock()
+    cache = UniProtCache(str(tmp_path / "uniprot.sqlite"), ttl=60, clock=clock)
+    cache.put("P00666", {"function": "Cached", "subcellular_location": ""})
+    clock.now += 61
+    assert fetch_uniprot_bulk(["P00666"], rate=None, url=url, cache=cache)["P00666"]["function"] == "Cached"
+    cache.close()
+
+def test_fetch_uniprot_bulk_rate_limit(uniprot_server):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    start = time.monotonic()
+    fetch_uniprot_bulk([f"P{i:05d}" for i in range(1, 6)], concurrency=5, rate=50, url=url)
+    # Five request starts at 50 per second take at least 4 intervals of 20 ms.
+    assert time.monotonic() - start >= 0.08
+
+def test_enrich_targets(uniprot_server):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    targets = pd.DataFrame({"Drug_ID": ["DB1", "DB2", "DB3"], "UniProt_ID": ["P00001", "P00001", None]})
+    df = enrich_targets(targets, rate=None, url=url)
+    assert list(df["function"]) == ["Function of P00001", "Function of P00001", ""]
+    assert uniprot_server.requests == ["P00001"]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_uniprot_cache_revalidates_stale_entries(uniprot_server, tmp_path):
+    url = f"http://127.0.0.1:{uniprot_server.server_port}/{{}}.xml"
+    ids = ["P00001", "P00002", "P00404"]
+    clock = FakeClock()
+    cache = UniProtCache(str(tmp_path / "uniprot.sqlite"), ttl=60, clock=clock)
+    cold = fetch_uniprot_bulk(ids, rate=None, url=url, cache=cache)
+    assert sorted(uniprot_server.requests) == ids
+
+    # A warm run within the TTL makes no requests, also after reopening the cache file.
+    cache.close()
+    cache = UniProtCache(str(tmp_path / "uniprot.sqlite"), ttl=60, clock=clock)
+    assert fetch_uniprot_bulk(ids, rate=None, url=url, cache=cache) == cold
+    assert len(uniprot_server.requests) == 3
+
+    # After the TTL the entries are revalidated with their ETag and stay fresh for another TTL.
+    clock.now += 61
+    assert fetch_uniprot_bulk(ids, rate=None, url=url, cache=cache) == cold
+    assert sorted(uniprot_server.not_modified) == ["P00001", "P00002"]
+    assert fetch_uniprot_bulk(ids, rate=None, url=url, cache=cache) == cold
+    assert len(uniprot_server.requests) == 6
+    cache.close()
+
+def test_uniprot_cache_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    cache = UniProtCache(str(tmp_path / "uniprot.sqlite"), max_entries=2, clock=clock)
+    for accession in ["P1", "P2"]:
+        clock.now += 1
+        cache.put(accession, {"function": accession, "subcellular_location": ""})
+    # Reading P1 makes P2 the least recently used entry.
+    clock.now += 1
+    assert cache.get("P1")["details"]["function"] == "P1"
+    clock.now += 1
+    cache.put("P3", {"function": "P3", "subcellular_location": ""}, etag='"v1"')
+
+    assert cache.get("P2") is None
+    assert cache.get("P1")["fresh"]
+    assert cache.get("P3")["etag"] == '"v1"'
+    cache.close()
+
+def test_uniprot_cache_reads_do_not_lock_writers(tmp_path):
+    path = str(tmp_path / "uniprot.sqlite")
+    reader = UniProtCache(path)
+    writer = UniProtCache(path)
+    writer.put("P1", {"function": "P1", "subcellular_location": ""})
+    assert reader.get("P1")["details"]["function"] == "P1"
+    # The recency update of the read is committed, so another connection can still write.
+    writer.connection.execute("PRAGMA busy_timeout = 100")
+    writer.put("P2", {"function": "P2", "subcellular_location": ""})
+    assert reader.get("P2")["details"]["function"] == "P2"
+    reader.close()
+    writer.close()
+
+def test_fetch_uniprot_details_caches_missing_entries(monkeypatch, tmp_path):
+    requested = []
+
+    def missing_requests_get(url, headers, timeout):
+        requested.append(url)
+        return DummyResponse("", status_code=404)
+
+    monkeypatch.setattr("subtask_12.requests.get", missing_requests_get)
+    cache = UniProtCache(str(tmp_path / "uniprot.sqlite"))
+    assert fetch_uniprot_details("P99999", cache) == {"function": "", "subcellular_location": ""}
+    # A warm run answers the missing entry from the cache.
+    assert fetch_uniprot_details("P99999", cache) == {"function": "", "subcellular_location": ""}
+    assert len(requested) == 1
+    cache.close()
@@ -1,6 +1,7 @@
 import os
 import sys
 import copy
+import gzip
 import random
 import textwrap
 import pytest
@@ -8,7 +9,8 @@ import xml.etree.ElementTree as ET
 
 # Add the subtask_13 directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_13"))
-from subtask_13 import get_namespace, strip_ns, build_pools, create_new_drug
+import subtask_13
+from subtask_13 import get_namespace, strip_ns, build_pools, create_new_drug, serialize_pools, generate_drug_xml, main
 
 @pytest.fixture
 def sample_drug_xml():
@@ -73,4 +75,104 @@ def test_create_new_drug(parsed_drugs, monkeypatch):
     
     # The new drug should include one element for each pool (plus the newly added drugbank-id).
     num_expected_children = 1 + len(pools)
-    assert len(new_drug) == num_expected_children
\ No newline at end of file
+    assert len(new_drug) == num_expected_children
+
+def test_generate_drug_xml_matches_create_new_drug(parsed_drugs):
+    drugs, ns_uri = parsed_drugs
+    pools = build_pools(drugs)
+    ET.register_namespace('', ns_uri)
+    original_attribs = {"type": "small molecule"}
+
+    # With the same random state both functions pick the same pool elements.
+    random.seed(7)
+    expected = create_new_drug(3, pools, ns_uri, original_attribs)
+    random.seed(7)
+    drug_xml = generate_drug_xml(3, serialize_pools(pools, ns_uri), original_attribs)
+
+    generated = ET.fromstring(f'<drugbank xmlns="{ns_uri}">{drug_xml}</drugbank>')[0]
+    generated.tail = None
+    assert ET.tostring(generated) == ET.tostring(expected)
+
+def open_output_for_reading(output_file):
+    if str(output_file).endswith(".gz"):
+        return gzip.open(output_file, "rb")
+    return open(output_file, "rb")
+
+@pytest.mark.parametrize("output_name", ["generated.xml", "generated.xml.gz"])
+def test_main_streams_database(sample_drug_xml, tmp_path, output_name):
+    input_file = tmp_path / "input.xml"
+    input_file.write_text(sample_drug_xml)
+    output_file = tmp_path / output_name
+
+    main(total_drugs=5, input_file=str(input_file), output_file=str(output_file))
+
+    # The output keeps the two original drugs and adds three with consecutive IDs.
+    with open_output_for_reading(output_file) as file:
+        root = ET.parse(file).getroot()
+    ns = {"db": get_namespace(root)}
+    ids = [drug.find("db:drugbank-id", ns).text for drug in root.findall("db:drug", ns)]
+    assert ids == ["DB0001", "DB0002", "DB00003", "DB00004", "DB00005"]
+
+@pytest.mark.parametrize("output_name", ["generated.xml", "generated.xml.gz"])
+def test_sharded_generation_is_independent_of_worker_count(sample_drug_xml, tmp_path, monkeypatch, output_name):
+    input_file = tmp_path / "input.xml"
+    input_file.write_text(sample_drug_xml)
+    # Small shards so that seven new drugs are split across several workers.
+    monkeypatch.setattr(subtask_13, "SHARD_SIZE", 2)
+
+    outputs = []
+    for workers in (1, 2):
+        output_file = tmp_path / f"{workers}-{output_name}"
+        main(total_drugs=9, input_file=str(input_file), output_file=str(output_file), seed=42, workers=workers)
+        outputs.append(output_file.read_bytes())
+    assert outputs[0] == outputs[1]
+
+    # The shards are joined in ID order, leaving no temporary part files behind.
+    with open_output_for_reading(tmp_path / f"1-{output_name}") as file:
+        root = ET.parse(file).getroot()
+    ns = {"db": get_namespace(root)}
+    ids = [drug.find("db:drugbank-id", ns).text for drug in root.findall("db:drug", ns)]
+    assert ids == ["DB0001", "DB0002"] + [f"DB{i:05d}" for i in range(3, 10)]
+    assert sorted(os.listdir(tmp_path)) == sorted(["input.xml", f"1-{output_name}", f"2-{output_name}"])
+
+    # Another master seed gives a different database.
+    output_file = tmp_path / f"other-{output_name}"
+    main(total_drugs=9, input_file=str(input_file), output_file=str(output_file), seed=7, workers=1)
+    assert output_file.read_bytes() != outputs[0]
+
+def test_failed_sharded_generation_keeps_previous_output(sample_drug_xml, tmp_path, monkeypatch):
+    input_file = tmp_path / "input.xml"
+    input_file.write_text(sample_drug_xml)
+    output_file = tmp_path / "generated.xml"
+    output_file.write_text("previous database")
+
+    # Fail while writing the footer, after every shard has been joined.
+    encode_part = subtask_13.encode_part
+    def failing_encode_part(text, compress):
+        if "</drugbank>" in text:
+            raise OSError("disk full")
+        return encode_part(text, compress)
+    monkeypatch.setattr(subtask_13, "encode_part", failing_encode_part)
+
+    with pytest.raises(OSError):
+        main(total_drugs=5, input_file=str(input_file), output_file=str(output_file), seed=42, workers=1)
+    # The previous output is untouched and no temporary file is left behind.
+    assert output_file.read_text() == "previous database"
+    assert sorted(os.listdir(tmp_path)) == ["generated.xml", "input.xml"]
+
+def test_failed_generation_keeps_previous_output(sample_drug_xml, tmp_path, monkeypatch):
+    input_file = tmp_path / "input.xml"
+    input_file.write_text(sample_drug_xml)
+    output_file = tmp_path / "generated.xml"
+    output_file.write_text("previous database")
+
+    # Fail while writing the footer, after every new drug has been written.
+    def failing_database_footer(root):
+        raise OSError("disk full")
+    monkeypatch.setattr(subtask_13, "database_footer", failing_database_footer)
+
+    with pytest.raises(OSError):
+        main(total_drugs=5, input_file=str(input_file), output_file=str(output_file))
+    # The previous output is untouched and no temporary file is left behind.
+    assert output_file.read_text() == "previous database"
+    assert sorted(os.listdir(tmp_path)) == ["generated.xml", "input.xml"]
@@ -0,0 +1,167 @@
+import gc
+import os
+import sys
+import json
+import sqlite3
+import threading
+import textwrap
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the subtask_15 directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "subtask_15"))
+import subtask_15
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # DrugA is listed in two pathways, DrugB in one.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug>
+            <drugbank-id primary="true">DB01</drugbank-id>
+            <name>DrugA</name>
+            <pathways>
+              <pathway>
+                <smpdb-id>P001</smpdb-id>
+                <name>P1</name>
+                <drugs>
+                  <drug><drugbank-id>DB01</drugbank-id><name>DrugA</name></drug>
+                  <drug><drugbank-id>DB02</drugbank-id><name>DrugB</name></drug>
+                </drugs>
+              </pathway>
+              <pathway>
+                <smpdb-id>P002</smpdb-id>
+                <name>P2</name>
+                <drugs>
+                  <drug><drugbank-id>DB01</drugbank-id><name>DrugA</name></drug>
+                </drugs>
+              </pathway>
+            </pathways>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+@pytest.fixture
+def client(sample_xml, monkeypatch):
+    monkeypatch.setattr(subtask_15, "XML_FILE_PATH", str(sample_xml))
+    monkeypatch.setattr(subtask_15, "USE_TABLE_CACHE", False)
+    monkeypatch.setattr(subtask_15, "RELOAD_INTERVAL", 0)
+    with TestClient(subtask_15.app) as test_client:
+        yield test_client
+
+def test_build_drug_count_index(sample_xml):
+    index = subtask_15.build_drug_count_index(str(sample_xml), use_cache=False)
+    assert index.by_name == {"DrugA": 2, "DrugB": 1}
+    assert index.lookup("DB02") == 1
+    assert index.lookup("Unknown") is None
+
+def test_mapped_index_matches_dicts(sample_xml):
+    index = subtask_15.build_drug_count_index(str(sample_xml), use_cache=False)
+    mapped = subtask_15.load_drug_count_index(str(sample_xml), use_cache=False)
+
+    # The index file is written once, next to the XML file, and reused by later loads.
+    assert os.path.exists(subtask_15.index_file_path(str(sample_xml)))
+    for drug in ["DrugA", "DrugB", "DB01", "DB02", "Unknown"]:
+        assert mapped.lookup(drug) == index.lookup(drug)
+    mapped.close()
+
+def test_index_cleanup_tolerates_concurrent_removal(sample_xml, monkeypatch):
+    # Another worker removed an old index file between listing and removal.
+    listdir = os.listdir
+    stale = f"{os.path.basename(str(sample_xml))}-drug_count-0-0.sqlite"
+    monkeypatch.setattr(subtask_15.os, "listdir", lambda path: listdir(path) + [stale])
+    mapped = subtask_15.load_drug_count_index(str(sample_xml), use_cache=False)
+    assert mapped.lookup("DrugA") == 2
+    mapped.close()
+
+def test_get_drug_count(client, monkeypatch):
+    # Requests must be served from the index built at startup, without parsing the XML again.
+    monkeypatch.setattr(subtask_15, "parse_all_pathways", lambda file_path: pytest.fail("XML parsed per request"))
+
+    response = client.post("/drug_count", json={"drug": "DrugA"})
+    assert response.status_code == 200
+    assert response.json() == {"drug": "DrugA", "pathway_count": 2}
+
+    response = client.post("/drug_count", json={"drug": "Unknown"})
+    assert response.status_code == 404
+
+def test_get_drug_counts_batch(client):
+    response = client.post("/drug_count/batch", json={"drugs": ["DrugA", "DB02", "Unknown"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    # One JSON line per requested drug, in request order, with misses reported inline.
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"drug": "DrugA", "pathway_count": 2},
+        {"drug": "DB02", "pathway_count": 1},
+        {"drug": "Unknown", "error": "Drug not found"}
+    ]
+
+def add_pathway_for_drug_b(xml_file):
+    # Give DrugB a second pathway, which also changes the file size.
+    xml_file.write_text(xml_file.read_text().replace(
+        "<drug><drugbank-id>DB01</drugbank-id><name>DrugA</name></drug>\n        </drugs>",
+        "<drug><drugbank-id>DB01</drugbank-id><name>DrugA</name></drug>\n"
+        "          <drug><drugbank-id>DB02</drugbank-id><name>DrugB</name></drug>\n        </drugs>"))
+
+def test_reload_swaps_index(sample_xml):
+    reloader = subtask_15.IndexReloader(str(sample_xml), use_cache=False)
+    old_index = reloader.index
+    assert reloader.reload_if_changed() is False
+
+    add_pathway_for_drug_b(sample_xml)
+    assert reloader.reload_if_changed() is True
+
+    # The new index is swapped in, while a request holding the old one still sees the old data.
+    assert reloader.index.lookup("DrugB") == 2
+    assert old_index.lookup("DrugB") == 1
+    assert reloader.reload_if_changed() is False
+
+def test_reload_closes_old_index(sample_xml):
+    reloader = subtask_15.IndexReloader(str(sample_xml), use_cache=False)
+    old_connection = reloader.index.connection
+    add_pathway_for_drug_b(sample_xml)
+    assert reloader.reload_if_changed() is True
+
+    # Nothing holds the old index any more, so its connection is closed.
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_connection.execute("SELECT 1")
+    reloader.index.close()
+
+def test_shutdown_closes_index(sample_xml, monkeypatch):
+    monkeypatch.setattr(subtask_15, "XML_FILE_PATH", str(sample_xml))
+    monkeypatch.setattr(subtask_15, "USE_TABLE_CACHE", False)
+    monkeypatch.setattr(subtask_15, "RELOAD_INTERVAL", 0)
+    with TestClient(subtask_15.app):
+        connection = subtask_15.app.state.reloader.index.connection
+        connection.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+
+def test_concurrent_reloads_are_coalesced(sample_xml, monkeypatch):
+    reloader = subtask_15.IndexReloader(str(sample_xml), use_cache=False)
+    builds = []
+    load_index = subtask_15.load_drug_count_index
+    monkeypatch.setattr(subtask_15, "load_drug_count_index",
+                        lambda file_path, use_cache: builds.append(file_path) or load_index(file_path, use_cache))
+
+    add_pathway_for_drug_b(sample_xml)
+    threads = [threading.Thread(target=reloader.reload_if_changed) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert reloader.index.lookup("DrugB") == 2
+
+def test_reload_endpoint(client, sample_xml):
+    add_pathway_for_drug_b(sample_xml)
+    assert client.post("/reload").json() == {"reloaded": True}
+    assert client.post("/drug_count", json={"drug": "DrugB"}).json() == {"drug": "DrugB", "pathway_count": 2}
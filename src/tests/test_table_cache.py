@@ -0,0 +1,57 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from common.drugbank_tables import extract_tables
+from common.table_cache import load_tables, cache_entry_dir
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <groups>
+              <group>approved</group>
+            </groups>
+            <synonyms>
+              <synonym>Alpha</synonym>
+            </synonyms>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return xml_file
+
+def test_load_tables_roundtrip(sample_xml, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    tables = extract_tables(str(sample_xml))
+
+    # The first call parses and stores the tables, the second reads them back.
+    load_tables(str(sample_xml), cache_dir=cache_dir)
+    assert os.path.isdir(cache_entry_dir(str(sample_xml), cache_dir))
+    cached = load_tables(str(sample_xml), cache_dir=cache_dir)
+
+    for table in tables:
+        pd.testing.assert_frame_equal(cached[table], tables[table])
+    assert cached["synonyms"].iloc[0]["synonyms"] == ["Alpha"]
+
+def test_load_tables_invalidates_on_change(sample_xml, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    load_tables(str(sample_xml), cache_dir=cache_dir, use_hash=True)
+
+    # Changing the XML file gives a new fingerprint and replaces the old entry.
+    sample_xml.write_text(sample_xml.read_text().replace("DrugA", "DrugB"))
+    tables = load_tables(str(sample_xml), cache_dir=cache_dir, use_hash=True)
+
+    assert tables["drugs"].iloc[0]["name"] == "DrugB"
+    assert os.listdir(cache_dir) == [os.path.basename(cache_entry_dir(str(sample_xml), cache_dir, use_hash=True))]
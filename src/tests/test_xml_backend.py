@@ -0,0 +1,175 @@
+import os
+import sys
+import textwrap
+import pytest
+import pandas as pd
+
+# Add the src directory and the subtask directories to the Python path
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, SRC_DIR)
+for subtask in ["subtask_01", "subtask_02", "subtask_03", "subtask_06", "subtask_07", "subtask_09", "subtask_10", "subtask_11"]:
+    sys.path.insert(0, os.path.join(SRC_DIR, subtask))
+from common import xml_backend
+from common.aggregates import LocationCounts, StatusCounts, PathwayCounts, aggregate
+from common.drugbank_tables import extract_tables
+from common.drugbank_xml import NS, iter_drugs
+from common.sharded_parse import extract_tables_parallel
+import subtask_01
+import subtask_02
+import subtask_03
+import subtask_06
+import subtask_07
+import subtask_09
+import subtask_10
+import subtask_11
+
+@pytest.fixture
+def sample_xml(tmp_path):
+    # Two drugs with every table, a comment and nested pathway <drug> elements.
+    xml_content = textwrap.dedent("""\
+        <?xml version="1.0"?>
+        <drugbank xmlns="http://www.drugbank.ca">
+          <!-- DrugBank export -->
+          <drug type="biotech">
+            <drugbank-id>BTD0001</drugbank-id>
+            <drugbank-id primary="true">DB0001</drugbank-id>
+            <name>DrugA</name>
+            <description>Description &amp; notes</description>
+            <groups>
+              <group>approved</group>
+              <group>withdrawn</group>
+            </groups>
+            <synonyms>
+              <synonym>Alpha</synonym>
+            </synonyms>
+            <products>
+              <product>
+                <name>ProductA</name>
+                <labeller>Labeller A</labeller>
+                <fda-application-number>NDA0001</fda-application-number>
+              </product>
+            </products>
+            <pathways>
+              <pathway>
+                <smpdb-id>SMP0001</smpdb-id>
+                <name>Pathway 1</name>
+                <category>metabolic</category>
+                <drugs>
+                  <drug>
+                    <drugbank-id>DB0001</drugbank-id>
+                    <name>DrugA</name>
+                  </drug>
+                  <drug>
+                    <drugbank-id>DB0002</drugbank-id>
+                    <name>DrugB</name>
+                  </drug>
+                </drugs>
+              </pathway>
+            </pathways>
+            <drug-interactions>
+              <drug-interaction>
+                <drugbank-id>DB0002</drugbank-id>
+                <name>DrugB</name>
+                <description>DrugA may increase the effect of DrugB.</description>
+              </drug-interaction>
+            </drug-interactions>
+            <targets>
+              <target>
+                <id>BE0001</id>
+                <polypeptide id="P00001" source="Swiss-Prot">
+                  <name>Receptor 1</name>
+                  <gene-name>GENE1</gene-name>
+                  <cellular-location>Membrane</cellular-location>
+                  <external-identifiers>
+                    <external-identifier>
+                      <resource>GenAtlas</resource>
+                      <identifier>GENE1</identifier>
+                    </external-identifier>
+                  </external-identifiers>
+                </polypeptide>
+              </target>
+            </targets>
+          </drug>
+          <drug type="small molecule">
+            <drugbank-id primary="true">DB0002</drugbank-id>
+            <name>DrugB</name>
+            <groups>
+              <group>experimental</group>
+            </groups>
+          </drug>
+        </drugbank>
+    """)
+    xml_file = tmp_path / "sample_drugbank.xml"
+    xml_file.write_text(xml_content)
+    return str(xml_file)
+
+# Every parser, called on a file path.
+PARSERS = {
+    "subtask_01": lambda path: subtask_01.parse_drugbank_xml(path),
+    "subtask_01_stream": lambda path: subtask_01.parse_drugbank_xml(path, stream=True),
+    "subtask_02": lambda path: subtask_02.parse_drugbank_xml(path),
+    "subtask_03": lambda path: subtask_03.parse_pharma_products(path),
+    "subtask_06": lambda path: subtask_06.parse_all_pathways(path),
+    "subtask_07": lambda path: subtask_07.parse_targets_info(path),
+    "subtask_07_store": lambda path: subtask_07.parse_target_store(path),
+    "subtask_09": lambda path: subtask_09.parse_drug_status(path),
+    "subtask_10": lambda path: subtask_10.parse_drug_interactions(path),
+    "subtask_11": lambda path: subtask_11.parse_drugbank_for_gene(path, "gene1"),
+    "tables": lambda path: extract_tables(path),
+    "tables_stream": lambda path: extract_tables(path, stream=True),
+    "tables_sharded": lambda path: extract_tables_parallel(path, 1),
+    "aggregates": lambda path: [counter.result() for counter in
+                                aggregate(path, [LocationCounts(), StatusCounts(), PathwayCounts("drug_names")])],
+}
+
+# Compare parser results, which are DataFrames, or lists, tuples and dicts holding them.
+def assert_same(expected, result):
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(result, expected)
+    elif isinstance(expected, dict):
+        assert result.keys() == expected.keys()
+        for key in expected:
+            assert_same(expected[key], result[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(result) == len(expected)
+        for expected_item, item in zip(expected, result):
+            assert_same(expected_item, item)
+    else:
+        assert result == expected
+
+@pytest.mark.parametrize("parser", list(PARSERS))
+def test_lxml_matches_etree(sample_xml, parser, monkeypatch):
+    pytest.importorskip("lxml")
+    monkeypatch.setattr(xml_backend, "BACKEND", "etree")
+    expected = PARSERS[parser](sample_xml)
+    monkeypatch.setattr(xml_backend, "BACKEND", "lxml")
+    assert_same(expected, PARSERS[parser](sample_xml))
+
+def test_lxml_elements_use_compiled_xpath(sample_xml, monkeypatch):
+    pytest.importorskip("lxml")
+    monkeypatch.setattr(xml_backend, "BACKEND", "lxml")
+    monkeypatch.setattr(xml_backend, "XPATHS", {})
+    root = xml_backend.parse_xml(sample_xml).getroot()
+    drugs = xml_backend.findall(root, "db:drug", NS)
+    assert len(drugs) == 2
+    assert xml_backend.find(drugs[0], "db:drugbank-id[@primary='true']", NS).text == "DB0001"
+    assert xml_backend.find(drugs[1], "db:products", NS) is None
+    # Each path is compiled once and reused for every element.
+    xml_backend.find(drugs[1], "db:drugbank-id[@primary='true']", NS)
+    assert len(xml_backend.XPATHS) == 3
+
+def test_iter_drugs_skips_nested_drugs(sample_xml, monkeypatch):
+    pytest.importorskip("lxml")
+    monkeypatch.setattr(xml_backend, "BACKEND", "lxml")
+    assert [xml_backend.find(drug, "db:name", NS).text for drug in iter_drugs(sample_xml)] == ["DrugA", "DrugB"]
+
+def test_etree_fallback_without_lxml(sample_xml, monkeypatch):
+    monkeypatch.setattr(xml_backend, "HAVE_LXML", False)
+    monkeypatch.setattr(xml_backend, "BACKEND", "etree")
+    df = subtask_01.parse_drugbank_xml(sample_xml)
+    assert list(df["drug_id"]) == ["DB0001", "DB0002"]
+
+    # Asking for lxml when it is missing is an error rather than a silent fallback.
+    monkeypatch.setattr(xml_backend, "BACKEND", "lxml")
+    with pytest.raises(ImportError):
+        subtask_01.parse_drugbank_xml(sample_xml)